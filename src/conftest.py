@@ -0,0 +1 @@
+# Корень src: pytest добавляет эту директорию в sys.path, и тесты импортируют модули приложения как main.py
@@ -48,6 +48,10 @@ class DatabaseSettings(BaseSettings):
 	model_config = SettingsConfigDict(env_prefix="APP_")
 	url: str = "sqlite+aiosqlite:///data/app.db"
 	use_sqlalchemy_repos: bool = True
+	# Кеш связей чатов в памяти процесса (см. CachedConversationLinkRepository)
+	link_cache_ttl_seconds: float = 300.0
+	link_cache_negative_ttl_seconds: float = 30.0
+	link_cache_maxsize: int = 10_000
 
 class AppSettings(BaseSettings):
 	model_config = SettingsConfigDict(env_prefix="APP_")
@@ -4,11 +4,36 @@
 """
 
 import logging
-import json
 import traceback
 from typing import Any, Dict, Optional
 from datetime import datetime
 
+import orjson
+
+
+class JsonErrorFormatter(logging.Formatter):
+    """Форматирует запись лога в одну JSON-строку (формат errors.json)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        error_info = getattr(record, "error_info", None)
+        exception = None
+        if record.exc_info:
+            # ErrorReporter уже отформатировал traceback в error_info, повторно не форматируем
+            exception = (error_info or {}).get("traceback") or self.formatException(record.exc_info)
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "exception": exception,
+        }
+        if error_info is not None:
+            data["error_info"] = error_info
+        return orjson.dumps(data, default=str).decode()
+
 
 class ErrorReporter:
     """Класс для структурированного логирования ошибок"""
@@ -21,7 +46,8 @@ class ErrorReporter:
         error: Exception,
         context: Optional[Dict[str, Any]] = None,
         message: str = "",
-        include_traceback: bool = True
+        include_traceback: bool = True,
+        traceback_text: Optional[str] = None
     ) -> None:
         """
         Логирует ошибку с детальной информацией
@@ -31,6 +57,7 @@ class ErrorReporter:
             context: Дополнительный контекст ошибки (account_id, message_id, etc.)
             message: Дополнительное сообщение об ошибке
             include_traceback: Включать ли traceback в лог
+            traceback_text: Уже отформатированный traceback (иначе форматируется здесь)
         """
         error_info = {
             "error_type": type(error).__name__,
@@ -41,14 +68,14 @@ class ErrorReporter:
         }
 
         if include_traceback:
-            error_info["traceback"] = traceback.format_exc()
+            error_info["traceback"] = traceback_text if traceback_text is not None else traceback.format_exc()
 
         # Формируем сообщение для логирования
         log_message = f"Error: {error_info['error_type']} - {error_info['error_message']}"
         if message:
             log_message = f"{message} | {log_message}"
         if context:
-            log_message += f" | Context: {json.dumps(context, ensure_ascii=False, default=str)}"
+            log_message += f" | Context: {orjson.dumps(context, default=str).decode()}"
 
         # Логируем с полной информацией
         self.logger.error(log_message, exc_info=include_traceback, extra={
@@ -83,7 +110,8 @@ class ErrorReporter:
         target_provider: str,
         message_id: str,
         conversation_id: str,
-        account_id: Optional[str] = None
+        account_id: Optional[str] = None,
+        traceback_text: Optional[str] = None
     ) -> None:
         """Логирует ошибки обработки сообщений"""
         context = {
@@ -95,7 +123,7 @@ class ErrorReporter:
         }
 
         message = f"Message processing error: {source_provider} -> {target_provider}"
-        self.log_error(error, context, message)
+        self.log_error(error, context, message, traceback_text=traceback_text)
 
     def log_delivery_status_error(
         self,
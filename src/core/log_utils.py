@@ -0,0 +1,54 @@
+"""Вспомогательные объекты для ленивого форматирования аргументов логов"""
+
+import logging
+from typing import Any, Mapping
+
+
+class TruncatedText:
+	"""Обрезает текст до limit символов только при форматировании записи лога"""
+
+	__slots__ = ("text", "limit")
+
+	def __init__(self, text: str | None, limit: int = 100) -> None:
+		self.text = text
+		self.limit = limit
+
+	def __str__(self) -> str:
+		text = self.text
+		if text and len(text) > self.limit:
+			return text[: self.limit] + "..."
+		return str(text)
+
+
+class LazyJson:
+	"""
+	Сериализует pydantic модель в JSON только при форматировании записи лога.
+	Результат запоминается: каждый обработчик форматирует запись заново.
+	"""
+
+	__slots__ = ("model", "_json")
+
+	def __init__(self, model: Any) -> None:
+		self.model = model
+		self._json: str | None = None
+
+	def __str__(self) -> str:
+		if self._json is None:
+			self._json = self.model.model_dump_json()
+		return self._json
+
+
+class ContextLoggerAdapter(logging.LoggerAdapter):
+	"""
+	Привязывает к логгеру контекст (например, ID сообщения): он передается в extra
+	записи и добавляется префиксом к тексту, собранным один раз при создании.
+	"""
+
+	def __init__(self, logger: logging.Logger, extra: Mapping[str, Any]) -> None:
+		super().__init__(logger, extra)
+		self._prefix = "[" + " ".join(f"{key}={value}" for key, value in extra.items()) + "] "
+
+	def process(self, msg: Any, kwargs: Any) -> tuple[Any, Any]:
+		extra = kwargs.get("extra")
+		kwargs["extra"] = {**self.extra, **extra} if extra else self.extra
+		return f"{self._prefix}{msg}", kwargs
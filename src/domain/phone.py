@@ -0,0 +1,31 @@
+"""Проверки и нормализация номеров телефонов, общие для use case и провайдеров"""
+
+import re
+from functools import lru_cache
+
+# Максимальная длина номера по E.164 (без "+")
+PHONE_MAX_DIGITS = 15
+
+
+def is_phone_number(value: str | None) -> bool:
+	"""Похоже ли значение на номер телефона: только цифры и не длиннее E.164"""
+	return bool(value) and len(value) <= PHONE_MAX_DIGITS and value.isdigit()
+
+
+# Символы-разделители, которые выбрасываются из номера перед разбором
+_PHONE_STRIP = str.maketrans("", "", " -\t")
+# Российский номер без "+": 8XXXXXXXXXX / 7XXXXXXXXXX или 9XXXXXXXXX без кода страны
+_RU_PHONE_RE = re.compile(r"[78](\d{10})|(9\d{9})")
+
+
+# Номера одних и тех же клиентов повторяются, поэтому результат кешируется
+@lru_cache(maxsize=4096)
+def normalize_ru_phone(raw: str | None) -> str:
+	"""Приводит номер к виду +7XXXXXXXXXX; прочие номера получают "+" спереди"""
+	norm = (raw or "").translate(_PHONE_STRIP).strip()
+	if not norm or norm[0] == "+":
+		return norm
+	match = _RU_PHONE_RE.fullmatch(norm)
+	if match is not None:
+		return "+7" + (match.group(1) or match.group(2))
+	return "+" + norm
@@ -1,8 +1,9 @@
-from .message_provider import MessageProvider, StatusNotifier
+from .message_provider import MessageProvider, ChatCreator, StatusNotifier
 from .source_provider import SourceProvider
 
 __all__ = [
 	"MessageProvider",
+	"ChatCreator",
 	"StatusNotifier",
 	"SourceProvider",
 ]
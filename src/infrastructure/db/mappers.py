@@ -1,10 +1,10 @@
-from domain.models import ConversationLink, MessageLink
+from domain.models import ConversationLink, MessageLink, ProviderName
 from .models import ConversationLinkORM, MessageLinkORM
 
 
 def to_conversation_link_model(orm: ConversationLinkORM) -> ConversationLink:
     """Преобразует ORM модель в доменную модель ConversationLink"""
-    return ConversationLink(
+    return ConversationLink.model_construct(
         amocrm_chat_id=orm.amocrm_chat_id,
         edna_conversation_id=orm.edna_conversation_id,
     )
@@ -20,10 +20,11 @@ def to_conversation_link_orm(domain: ConversationLink) -> ConversationLinkORM:
 
 def to_message_link_model(orm: MessageLinkORM) -> MessageLink:
     """Преобразует ORM модель в доменную модель MessageLink"""
-    return MessageLink(
-        source_provider=orm.source_provider,
+    # Строки из БД уже прошли валидацию при записи, приводим только провайдеров к enum
+    return MessageLink.model_construct(
+        source_provider=ProviderName(orm.source_provider),
         source_message_id=orm.source_message_id,
-        target_provider=orm.target_provider,
+        target_provider=ProviderName(orm.target_provider),
         target_message_id=orm.target_message_id,
         target_conversation_id=orm.target_conversation_id,
     )
@@ -1,13 +1,13 @@
 import base64
 import hashlib
 import hmac
-import json
 import logging
 from datetime import datetime, timezone
 from email.utils import formatdate
 from typing import Any, Dict, Optional
 
 import httpx
+import orjson
 from domain.models import (
 	Message,
 	SentMessageResult,
@@ -27,7 +27,7 @@ from core.error_logger import get_error_reporter
 
 
 class AmoCrmHttpClient(MessageProvider, StatusNotifier):
-	def __init__(self, settings: AmoCrmSettings):
+	def __init__(self, settings: AmoCrmSettings, transport: Optional[httpx.AsyncBaseTransport] = None):
 		self._logger = logging.getLogger("amocrm.amojo")
 		self._settings = settings  # Сохраняем ссылку на объект настроек
 		self._amojo_base_url = settings.amojo_base_url.rstrip("/")
@@ -37,7 +37,7 @@ class AmoCrmHttpClient(MessageProvider, StatusNotifier):
 		self._connect_title = settings.connect_title
 		self._hook_api_version = settings.hook_api_version
 		self._channel_secret = settings.channel_secret.encode()
-		self._client = httpx.AsyncClient(base_url=self._amojo_base_url, timeout=10.0)
+		self._client = httpx.AsyncClient(base_url=self._amojo_base_url, timeout=10.0, transport=transport)
 		self._logger.info(
 			"Amojo client initialized base_url=%s channel_id=%s account_id=%s scope_id_present=%s",
 			self._amojo_base_url,
@@ -46,6 +46,10 @@ class AmoCrmHttpClient(MessageProvider, StatusNotifier):
 			bool(self._scope_id),
 		)
 
+	async def aclose(self) -> None:
+		"""Закрывает HTTP клиент"""
+		await self._client.aclose()
+
 	async def ensure_ready(self) -> None:
 		await self._ensure_scope_id()
 
@@ -76,7 +80,8 @@ class AmoCrmHttpClient(MessageProvider, StatusNotifier):
 		}
 
 	async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-		body_bytes = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+		# orjson сразу дает компактные UTF-8 байты, по ним же считается подпись
+		body_bytes = orjson.dumps(payload)
 		headers = self._headers_for("POST", path, body_bytes)
 		self._logger.debug(
 			"POST %s headers={Date=%s, Content-MD5=%s, X-Signature=%s} payload=%s",
@@ -7,7 +7,7 @@ from core.error_logger import get_error_reporter
 
 
 class AmoCrmRestClient:
-	def __init__(self, settings: AmoCrmSettings):
+	def __init__(self, settings: AmoCrmSettings, transport: Optional[httpx.AsyncBaseTransport] = None):
 		self._logger = logging.getLogger("amocrm.rest")
 		self._base_url = settings.base_url.rstrip("/")
 		self._token = settings.token
@@ -18,8 +18,13 @@ class AmoCrmRestClient:
 				"Content-Type": "application/json",
 			},
 			timeout=10.0,
+			transport=transport,
 		)
 
+	async def aclose(self) -> None:
+		"""Закрывает HTTP клиент"""
+		await self._client.aclose()
+
 	async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 		resp = await self._client.get(path, params=params)
 		self._logger.debug("REST GET %s params=%s status=%s", path, params, resp.status_code)
@@ -95,8 +100,11 @@ class AmoCrmRestClient:
 		if contacts_id is not None:
 			params["contact_id"] = contacts_id
 		if chats_id is not None:
-			for chat_id in chats_id:
-				params["chat_id"] = chat_id
+			# Несколько чатов передаются массивом chat_id[]=...&chat_id[]=...
+			if len(chats_id) == 1:
+				params["chat_id"] = chats_id[0]
+			else:
+				params["chat_id[]"] = list(chats_id)
 		self._logger.info(f"chat_id: {chats_id}")
 		try:
 			self._logger.debug("Получение связей контактов: contacts_id=%s, chats_id=%s", contacts_id, chats_id)
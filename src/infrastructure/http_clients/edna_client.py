@@ -1,8 +1,8 @@
-import json
 import logging
 from typing import Any, Dict, Optional
 
 import httpx
+import orjson
 from domain.models import (
 	Message,
 	SentMessageResult,
@@ -19,7 +19,7 @@ class EdnaHttpClient(MessageProvider, StatusNotifier):
 	SEND_PATH = "/api/cascade/schedule"
 	CALLBACK_PATH = "/api/callback/set"
 
-	def __init__(self, settings: EdnaSettings):
+	def __init__(self, settings: EdnaSettings, transport: Optional[httpx.AsyncBaseTransport] = None):
 		self._logger = logging.getLogger("edna")
 		self._api_key = settings.api_key
 		self._base_url = settings.base_url.rstrip("/")
@@ -32,7 +32,7 @@ class EdnaHttpClient(MessageProvider, StatusNotifier):
 		self._in_msg_cb = settings.in_message_callback_url
 		self._matcher_cb = settings.message_matcher_callback_url
 		self._headers = {"X-API-KEY": self._api_key, "Content-Type": "application/json"}
-		self._client = httpx.AsyncClient(base_url=self._base_url, headers=self._headers, timeout=10.0)
+		self._client = httpx.AsyncClient(base_url=self._base_url, headers=self._headers, timeout=10.0, transport=transport)
 		self._logger.info(
 			"Edna client initialized base_url=%s subject_id=%s callbacks_configured=%s",
 			self._base_url,
@@ -40,6 +40,10 @@ class EdnaHttpClient(MessageProvider, StatusNotifier):
 			bool(self._status_cb or self._in_msg_cb or self._matcher_cb),
 		)
 
+	async def aclose(self) -> None:
+		"""Закрывает HTTP клиент"""
+		await self._client.aclose()
+
 	async def get_channels(self, types: Optional[str] = None) -> list[Dict[str, Any]]:
 		"""Получить список каналов edna для диагностики"""
 		if types is None:
@@ -298,11 +302,12 @@ class EdnaHttpClient(MessageProvider, StatusNotifier):
 				message.attachment.url
 			)
 
-		self._logger.debug("Полный payload для Edna Cascade Schedule: %s", json.dumps(payload, indent=2, ensure_ascii=False))
+		debug = self._logger.isEnabledFor(logging.DEBUG)
+		if debug:
+			self._logger.debug("Полный payload для Edna Cascade Schedule: %s", orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode())
 
 		try:
 			self._logger.debug("Выполнение HTTP запроса к Edna API: %s%s", self._base_url, self.SEND_PATH)
-			self._logger.debug("Отправляемый payload в Edna: %s", json.dumps(payload, ensure_ascii=False))
 			response = await self._client.post(self.SEND_PATH, json=payload)
 
 			self._logger.debug(
@@ -321,7 +326,8 @@ class EdnaHttpClient(MessageProvider, StatusNotifier):
 			response.raise_for_status()
 
 			data: Dict[str, Any] = response.json() if response.content else {}
-			self._logger.debug("Ответ от Edna API: %s", json.dumps(data, indent=2, ensure_ascii=False))
+			if debug:
+				self._logger.debug("Ответ от Edna API: %s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
 
 			returned_id: Optional[str] = (
 				data.get("requestId")
@@ -357,7 +363,7 @@ class EdnaHttpClient(MessageProvider, StatusNotifier):
 			)
 			self._logger.error(
 				"Детальный ответ Edna API при ошибке: %s",
-				json.dumps({"status_code": e.response.status_code, "response_body": e.response.text}, ensure_ascii=False)
+				orjson.dumps({"status_code": e.response.status_code, "response_body": e.response.text}).decode()
 			)
 
 
@@ -12,7 +12,7 @@ from core.error_logger import get_error_reporter
 class AmoCrmSourceProvider(SourceProvider):
 	"""Реализация SourceProvider для работы с API источников AmoCRM"""
 
-	def __init__(self, settings: AmoCrmSettings):
+	def __init__(self, settings: AmoCrmSettings, transport: Optional[httpx.AsyncBaseTransport] = None):
 		self._logger = logging.getLogger("amocrm.sources")
 		self._base_url = settings.base_url.rstrip("/")
 		self._token = settings.token
@@ -23,9 +23,14 @@ class AmoCrmSourceProvider(SourceProvider):
 				"Content-Type": "application/json",
 			},
 			timeout=10.0,
+			transport=transport,
 		)
 		self._logger.info("AmoCRM Source Provider initialized")
 
+	async def aclose(self) -> None:
+		"""Закрывает HTTP клиент"""
+		await self._client.aclose()
+
 	async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 		"""Вспомогательный метод для GET запросов"""
 		resp = await self._client.get(path, params=params)
@@ -0,0 +1,23 @@
+import httpx
+
+# Лимиты общего пула соединений для всех HTTP клиентов интеграции
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+
+def create_shared_transport() -> httpx.AsyncHTTPTransport:
+	"""
+	Создает транспорт с одним пулом keep-alive соединений.
+
+	Пул ведется по хостам, поэтому один транспорт можно отдать клиентам
+	Edna и AmoCRM с разными base_url: соединения переиспользуются между
+	вебхуками, а не открываются заново на каждую отправку.
+	"""
+	return httpx.AsyncHTTPTransport(
+		limits=httpx.Limits(
+			max_connections=MAX_CONNECTIONS,
+			max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+			keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+		),
+	)
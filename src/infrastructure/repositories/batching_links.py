@@ -0,0 +1,65 @@
+import asyncio
+from typing import Optional
+
+from use_cases import MessageLinkRepository
+from domain.models import MessageLink
+
+# Сколько ждем остальные запросы, прежде чем выполнить общий запрос к репозиторию
+BATCH_WINDOW_SECONDS = 0.005
+
+
+class BatchingMessageLinkRepository(MessageLinkRepository):
+	"""
+	Объединяет одновременные get_link_by_source_id в один запрос.
+
+	Запросы, пришедшие в течение BATCH_WINDOW_SECONDS, выполняются одним
+	get_links_by_source_ids; повторные запросы одного и того же ID ждут
+	общий результат. Записи передаются во внутренний репозиторий как есть.
+	"""
+
+	def __init__(self, inner: MessageLinkRepository):
+		self._inner = inner
+		# source_message_id -> результат, который получат все ожидающие этот ID
+		self._waiting: dict[str, asyncio.Future] = {}
+		self._flush_handle: Optional[asyncio.TimerHandle] = None
+		# Ссылки на запущенные загрузки, чтобы задачи не собрал GC до завершения
+		self._loads: set[asyncio.Task] = set()
+
+	async def get_link_by_source_id(self, source_message_id: str) -> MessageLink | None:
+		future = self._waiting.get(source_message_id)
+		if future is None:
+			loop = asyncio.get_running_loop()
+			future = loop.create_future()
+			self._waiting[source_message_id] = future
+			if self._flush_handle is None:
+				self._flush_handle = loop.call_later(BATCH_WINDOW_SECONDS, self._flush)
+		# shield: отмена одного ожидающего не должна отменять результат для остальных
+		return await asyncio.shield(future)
+
+	def _flush(self) -> None:
+		self._flush_handle = None
+		waiting, self._waiting = self._waiting, {}
+		task = asyncio.create_task(self._load(waiting))
+		self._loads.add(task)
+		task.add_done_callback(self._loads.discard)
+
+	async def _load(self, waiting: dict[str, asyncio.Future]) -> None:
+		try:
+			links = await self._inner.get_links_by_source_ids(list(waiting))
+		except Exception as e:
+			for future in waiting.values():
+				if not future.done():
+					future.set_exception(e)
+			return
+		for source_message_id, future in waiting.items():
+			if not future.done():
+				future.set_result(links.get(source_message_id))
+
+	async def get_links_by_source_ids(self, source_message_ids: list[str]) -> dict[str, MessageLink | None]:
+		return await self._inner.get_links_by_source_ids(source_message_ids)
+
+	async def save_link(self, link: MessageLink) -> None:
+		await self._inner.save_link(link)
+
+	async def save_links(self, links: list[MessageLink]) -> None:
+		await self._inner.save_links(links)
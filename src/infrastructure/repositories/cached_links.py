@@ -0,0 +1,121 @@
+import time
+from typing import Awaitable, Callable, Optional
+
+from use_cases import ConversationLinkRepository
+from domain.models import ConversationLink
+
+# Значения по умолчанию: время жизни найденных и ненайденных значений (секунды)
+# и максимум записей в каждом направлении (при переполнении вытесняется самая давно использованная)
+POSITIVE_TTL_SECONDS = 300.0
+NEGATIVE_TTL_SECONDS = 30.0
+CACHE_MAXSIZE = 10_000
+
+
+class CachedConversationLinkRepository(ConversationLinkRepository):
+	"""
+	Read-through кеш поверх репозитория связей чатов.
+
+	Кеширует get_amocrm_chat_id / get_edna_conversation_id / get_phone_by_chat_id
+	в памяти процесса, включая промахи (с меньшим TTL). Каждый кеш ограничен
+	maxsize записями с вытеснением по LRU. Записи через этот
+	репозиторий сбрасывают затронутые ключи в обоих направлениях.
+	"""
+
+	def __init__(
+		self,
+		inner: ConversationLinkRepository,
+		ttl: float = POSITIVE_TTL_SECONDS,
+		negative_ttl: float = NEGATIVE_TTL_SECONDS,
+		maxsize: int = CACHE_MAXSIZE,
+	):
+		self._inner = inner
+		self._ttl = ttl
+		self._negative_ttl = negative_ttl
+		self._maxsize = maxsize
+		# ключ -> (monotonic время истечения, значение)
+		self._chat_by_edna: dict[str, tuple[float, Optional[str]]] = {}
+		self._edna_by_chat: dict[str, tuple[float, Optional[str]]] = {}
+		self._phone_by_chat: dict[str, tuple[float, Optional[str]]] = {}
+
+	async def _get(
+		self,
+		cache: dict[str, tuple[float, Optional[str]]],
+		key: str,
+		loader: Callable[[str], Awaitable[Optional[str]]],
+	) -> Optional[str]:
+		now = time.monotonic()
+		entry = cache.pop(key, None)
+		if entry is not None and entry[0] > now:
+			# Переставляем в конец: dict хранит порядок вставки, начало — кандидат на вытеснение
+			cache[key] = entry
+			return entry[1]
+
+		value = await loader(key)
+		self._put(cache, key, value, now)
+		return value
+
+	def _put(
+		self,
+		cache: dict[str, tuple[float, Optional[str]]],
+		key: str,
+		value: Optional[str],
+		now: float,
+	) -> None:
+		ttl = self._ttl if value is not None else self._negative_ttl
+		cache.pop(key, None)
+		if len(cache) >= self._maxsize:
+			del cache[next(iter(cache))]
+		cache[key] = (now + ttl, value)
+
+	def _invalidate_chat(self, amocrm_chat_id: str) -> None:
+		"""Сбрасывает кеш чата и обратную запись для ранее связанного разговора Edna"""
+		entry = self._edna_by_chat.pop(amocrm_chat_id, None)
+		if entry is not None and entry[1] is not None:
+			self._chat_by_edna.pop(entry[1], None)
+		self._phone_by_chat.pop(amocrm_chat_id, None)
+
+	async def get_edna_conversation_id(self, amocrm_chat_id: str) -> str | None:
+		return await self._get(self._edna_by_chat, amocrm_chat_id, self._inner.get_edna_conversation_id)
+
+	async def get_amocrm_chat_id(self, edna_conversation_id: str) -> str | None:
+		return await self._get(self._chat_by_edna, edna_conversation_id, self._inner.get_amocrm_chat_id)
+
+	async def get_amocrm_chat_ids_bulk(self, edna_conversation_ids: list[str]) -> dict[str, str | None]:
+		now = time.monotonic()
+		result: dict[str, str | None] = {}
+		missing: list[str] = []
+		for edna_conversation_id in edna_conversation_ids:
+			entry = self._chat_by_edna.pop(edna_conversation_id, None)
+			if entry is not None and entry[0] > now:
+				self._chat_by_edna[edna_conversation_id] = entry
+				result[edna_conversation_id] = entry[1]
+			else:
+				missing.append(edna_conversation_id)
+
+		if missing:
+			loaded = await self._inner.get_amocrm_chat_ids_bulk(missing)
+			for edna_conversation_id in missing:
+				value = loaded.get(edna_conversation_id)
+				self._put(self._chat_by_edna, edna_conversation_id, value, now)
+				result[edna_conversation_id] = value
+		return result
+
+	async def get_phone_by_chat_id(self, amocrm_chat_id: str) -> str | None:
+		return await self._get(self._phone_by_chat, amocrm_chat_id, self._inner.get_phone_by_chat_id)
+
+	async def get_chat_id_by_phone(self, phone_number: str) -> str | None:
+		return await self._inner.get_chat_id_by_phone(phone_number)
+
+	async def save_link(self, link: ConversationLink) -> None:
+		await self._inner.save_link(link)
+		self._invalidate_chat(link.amocrm_chat_id)
+		self._chat_by_edna.pop(link.edna_conversation_id, None)
+
+	async def save_phone_for_chat(self, amocrm_chat_id: str, phone_number: str) -> None:
+		await self._inner.save_phone_for_chat(amocrm_chat_id, phone_number)
+		self._phone_by_chat.pop(amocrm_chat_id, None)
+
+	async def save_link_with_phone(self, link: ConversationLink, phone_number: str) -> None:
+		await self._inner.save_link_with_phone(link, phone_number)
+		self._invalidate_chat(link.amocrm_chat_id)
+		self._chat_by_edna.pop(link.edna_conversation_id, None)
@@ -18,6 +18,14 @@ class InMemoryConversationLinkRepository(ConversationLinkRepository):
 				return amocrm_id
 		return None
 
+	async def get_amocrm_chat_ids_bulk(self, edna_conversation_ids: list[str]) -> dict[str, str | None]:
+		"""Получить ID чатов AmoCRM для нескольких разговоров Edna за один проход"""
+		result: dict[str, str | None] = dict.fromkeys(edna_conversation_ids)
+		for amocrm_id, edna_id in self._links.items():
+			if edna_id in result and result[edna_id] is None:
+				result[edna_id] = amocrm_id
+		return result
+
 	async def get_phone_by_chat_id(self, amocrm_chat_id: str) -> str | None:
 		"""Получить номер телефона по ID чата AmoCRM"""
 		return self._phones.get(amocrm_chat_id)
@@ -37,6 +45,11 @@ class InMemoryConversationLinkRepository(ConversationLinkRepository):
 		"""Сохранить номер телефона для чата AmoCRM"""
 		self._phones[amocrm_chat_id] = phone_number
 
+	async def save_link_with_phone(self, link: ConversationLink, phone_number: str) -> None:
+		"""Сохранить связь чатов вместе с номером телефона"""
+		self._links[link.amocrm_chat_id] = link.edna_conversation_id
+		self._phones[link.amocrm_chat_id] = phone_number
+
 
 class InMemoryMessageLinkRepository:
 	def __init__(self):
@@ -60,10 +73,18 @@ class InMemoryMessageLinkRepository:
 				self._logger.debug("Сохраненные source_ids: %s", list(self._links.keys())[:5])  # Показываем первые 5
 		return link
 
+	async def get_links_by_source_ids(self, source_message_ids: list[str]) -> dict[str, MessageLink | None]:
+		return {source_message_id: self._links.get(source_message_id) for source_message_id in source_message_ids}
+
 	async def save_link(self, link: MessageLink) -> None:
 		self._logger.debug(
 			"Сохраняем связь: source_provider=%s, source_id=%s -> target_provider=%s, target_id=%s",
 			link.source_provider, link.source_message_id, link.target_provider, link.target_message_id
 		)
 		self._links[link.source_message_id] = link
-		self._logger.debug("Всего связей после сохранения: %d", len(self._links))
\ No newline at end of file
+		self._logger.debug("Всего связей после сохранения: %d", len(self._links))
+
+	async def save_links(self, links: list[MessageLink]) -> None:
+		for link in links:
+			self._links[link.source_message_id] = link
+		self._logger.debug("Сохранено связей пачкой: %d, всего связей: %d", len(links), len(self._links))
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from typing import Optional
+
+from use_cases import MessageLinkRepository
+from domain.models import MessageLink
+
+# Как часто и какими пачками сбрасываем накопленные связи в репозиторий
+FLUSH_INTERVAL_SECONDS = 0.05
+FLUSH_BATCH_SIZE = 500
+# Сколько раз пробуем записать связь, прежде чем отбросить ее, и пауза между попытками
+FLUSH_MAX_ATTEMPTS = 3
+FLUSH_RETRY_DELAY_SECONDS = 1.0
+
+
+class OutboxMessageLinkRepository(MessageLinkRepository):
+	"""
+	Буфер записи поверх репозитория связей сообщений.
+
+	save_link / save_links только кладут связи в память; фоновая задача через
+	FLUSH_INTERVAL_SECONDS после первой записи (или при накоплении FLUSH_BATCH_SIZE
+	связей) пишет их одной транзакцией через save_links, а при пустом буфере спит.
+	Чтение сначала смотрит в буфер, поэтому статус, пришедший сразу после
+	отправки, находит еще не записанную связь. Неудачная пачка возвращается в
+	буфер и повторяется; связь отбрасывается после FLUSH_MAX_ATTEMPTS попыток.
+	"""
+
+	def __init__(self, inner: MessageLinkRepository, logger: Optional[logging.Logger] = None):
+		self._inner = inner
+		self._logger = logger or logging.getLogger(__name__)
+		# source_message_id -> связь, ожидающая записи / записываемая сейчас
+		self._pending: dict[str, MessageLink] = {}
+		self._flushing: dict[str, MessageLink] = {}
+		# source_message_id -> число неудачных попыток записи
+		self._attempts: dict[str, int] = {}
+		self._flush_event = asyncio.Event()
+		# flush() может вызываться снаружи параллельно с воркером: пачки пишем по одной
+		self._flush_lock = asyncio.Lock()
+		self._task: Optional[asyncio.Task] = None
+		self._closing = False
+
+	async def get_link_by_source_id(self, source_message_id: str) -> MessageLink | None:
+		link = self._pending.get(source_message_id) or self._flushing.get(source_message_id)
+		if link is not None:
+			return link
+		return await self._inner.get_link_by_source_id(source_message_id)
+
+	async def get_links_by_source_ids(self, source_message_ids: list[str]) -> dict[str, MessageLink | None]:
+		result: dict[str, MessageLink | None] = {}
+		missing: list[str] = []
+		for source_message_id in source_message_ids:
+			link = self._pending.get(source_message_id) or self._flushing.get(source_message_id)
+			if link is not None:
+				result[source_message_id] = link
+			else:
+				missing.append(source_message_id)
+		if missing:
+			result.update(await self._inner.get_links_by_source_ids(missing))
+		return result
+
+	async def save_link(self, link: MessageLink) -> None:
+		was_empty = not self._pending
+		self._pending[link.source_message_id] = link
+		self._schedule(was_empty)
+
+	async def save_links(self, links: list[MessageLink]) -> None:
+		was_empty = not self._pending
+		for link in links:
+			self._pending[link.source_message_id] = link
+		self._schedule(was_empty)
+
+	def _schedule(self, was_empty: bool) -> None:
+		"""Запускает воркер при первой записи и будит его, если буфер был пуст или пачка набрана"""
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+		if was_empty or len(self._pending) >= FLUSH_BATCH_SIZE:
+			self._flush_event.set()
+
+	async def _run(self) -> None:
+		while not self._closing:
+			if not self._pending:
+				# Буфер пуст: спим без таймера до первой записи (или aclose)
+				await self._flush_event.wait()
+				self._flush_event.clear()
+				continue
+			if len(self._pending) < FLUSH_BATCH_SIZE:
+				# Копим пачку FLUSH_INTERVAL_SECONDS; раньше будят только набранная пачка и aclose
+				self._flush_event.clear()
+				try:
+					await asyncio.wait_for(self._flush_event.wait(), FLUSH_INTERVAL_SECONDS)
+				except asyncio.TimeoutError:
+					pass
+			if not await self._flush():
+				# Пауза перед повтором после ошибки записи; раньше будят только набранная пачка и aclose
+				self._flush_event.clear()
+				try:
+					await asyncio.wait_for(self._flush_event.wait(), FLUSH_RETRY_DELAY_SECONDS)
+				except asyncio.TimeoutError:
+					pass
+
+	async def flush(self) -> None:
+		"""Записывает накопленные связи сразу, не дожидаясь воркера"""
+		await self._flush()
+
+	async def _flush(self) -> bool:
+		"""Пишет буфер одной пачкой; False, если запись не удалась и связи возвращены в буфер"""
+		async with self._flush_lock:
+			if not self._pending:
+				return True
+			self._flushing, self._pending = self._pending, {}
+			try:
+				await self._inner.save_links(list(self._flushing.values()))
+			except Exception:
+				requeued, lost = self._requeue_failed()
+				# Репозиторий сам пишет отчет об ошибке; здесь фиксируем судьбу пачки
+				self._logger.exception(
+					"Не удалось записать пачку связей сообщений: %d (вернули в буфер %d, потеряно %d)",
+					len(self._flushing), requeued, lost,
+				)
+				return False
+			else:
+				for source_message_id in self._flushing:
+					self._attempts.pop(source_message_id, None)
+				return True
+			finally:
+				self._flushing = {}
+
+	def _requeue_failed(self) -> tuple[int, int]:
+		"""Возвращает неудачную пачку в буфер, не затирая более новые связи; отбрасывает исчерпавшие попытки"""
+		requeued = lost = 0
+		for source_message_id, link in self._flushing.items():
+			if source_message_id in self._pending:
+				# За время записи пришла более новая связь: попытки для нее считаются заново
+				self._attempts.pop(source_message_id, None)
+				continue
+			attempts = self._attempts.get(source_message_id, 0) + 1
+			if attempts >= FLUSH_MAX_ATTEMPTS:
+				self._attempts.pop(source_message_id, None)
+				lost += 1
+				continue
+			self._attempts[source_message_id] = attempts
+			self._pending[source_message_id] = link
+			requeued += 1
+		return requeued, lost
+
+	async def aclose(self) -> None:
+		"""Останавливает воркер и записывает все, что осталось в буфере"""
+		# Воркер не отменяем, чтобы не оборвать запись пачки на середине
+		self._closing = True
+		self._flush_event.set()
+		if self._task is not None:
+			await self._task
+			self._task = None
+		# Каждая неудача расходует попытку, так что за FLUSH_MAX_ATTEMPTS проходов буфер опустеет
+		for attempt in range(FLUSH_MAX_ATTEMPTS):
+			if attempt:
+				await asyncio.sleep(FLUSH_RETRY_DELAY_SECONDS)
+			if await self._flush():
+				break
@@ -1,6 +1,8 @@
 import logging
 from typing import Optional
 from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from domain.models import ConversationLink, MessageLink
@@ -16,6 +18,15 @@ from core.error_logger import get_error_reporter
 
 logger = logging.getLogger(__name__)
 
+# Строк в одном многострочном INSERT: 5 колонок * 100 укладывается в лимит параметров SQLite (999)
+UPSERT_CHUNK_ROWS = 100
+
+# Диалекты с INSERT ... ON CONFLICT DO UPDATE; для остальных save_links делает merge построчно
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
 
 class SQLiteConversationLinkRepository(ConversationLinkRepository):
     """SQLAlchemy реализация репозитория связей между чатами"""
@@ -84,6 +95,35 @@ class SQLiteConversationLinkRepository(ConversationLinkRepository):
                 pass
             return None
 
+    async def get_amocrm_chat_ids_bulk(self, edna_conversation_ids: list[str]) -> dict[str, Optional[str]]:
+        """Получить ID чатов AmoCRM для нескольких разговоров Edna одним запросом"""
+        result: dict[str, Optional[str]] = dict.fromkeys(edna_conversation_ids)
+        if not edna_conversation_ids:
+            return result
+        try:
+            async with self._session_factory() as session:
+                stmt = select(
+                    ConversationLinkORM.edna_conversation_id,
+                    ConversationLinkORM.amocrm_chat_id,
+                ).where(ConversationLinkORM.edna_conversation_id.in_(edna_conversation_ids))
+                rows = await session.execute(stmt)
+                for edna_conversation_id, amocrm_chat_id in rows:
+                    result[edna_conversation_id] = amocrm_chat_id
+        except Exception as e:
+            self._logger.error(f"Ошибка при пакетном получении amocrm_chat_id: {e}")
+            try:
+                error_reporter = get_error_reporter()
+                error_reporter.log_error(
+                    error=e,
+                    context={
+                        "operation": "get_amocrm_chat_ids_bulk",
+                        "edna_conversation_ids": edna_conversation_ids
+                    }
+                )
+            except Exception:
+                pass
+        return result
+
     async def get_phone_by_chat_id(self, amocrm_chat_id: str) -> Optional[str]:
         """Получить номер телефона по ID чата AmoCRM"""
         try:
@@ -190,6 +230,36 @@ class SQLiteConversationLinkRepository(ConversationLinkRepository):
             raise
 
 
+    async def save_link_with_phone(self, link: ConversationLink, phone_number: str) -> None:
+        """Сохранить связь между чатами и номер телефона одной транзакцией"""
+        try:
+            async with self._session_factory() as session:
+                async with session.begin():
+                    orm_obj = to_conversation_link_orm(link)
+                    orm_obj.phone = phone_number
+                    await session.merge(orm_obj)
+
+            self._logger.debug(
+                f"Сохранена связь с телефоном: amocrm_chat_id={link.amocrm_chat_id} -> "
+                f"edna_conversation_id={link.edna_conversation_id}, phone={phone_number}"
+            )
+        except Exception as e:
+            self._logger.error(f"Ошибка при сохранении связи с телефоном: {e}")
+            try:
+                error_reporter = get_error_reporter()
+                error_reporter.log_error(
+                    error=e,
+                    context={
+                        "operation": "save_link_with_phone",
+                        "amocrm_chat_id": link.amocrm_chat_id,
+                        "edna_conversation_id": link.edna_conversation_id,
+                        "phone_number": phone_number
+                    }
+                )
+            except Exception:
+                pass
+            raise
+
 class SQLiteMessageLinkRepository(MessageLinkRepository):
     """SQLAlchemy реализация репозитория связей между сообщениями"""
 
@@ -229,6 +299,34 @@ class SQLiteMessageLinkRepository(MessageLinkRepository):
                 pass
             return None
 
+    async def get_links_by_source_ids(self, source_message_ids: list[str]) -> dict[str, Optional[MessageLink]]:
+        """Получить связи для нескольких исходных сообщений одним запросом"""
+        result: dict[str, Optional[MessageLink]] = dict.fromkeys(source_message_ids)
+        if not source_message_ids:
+            return result
+        try:
+            async with self._session_factory() as session:
+                stmt = select(MessageLinkORM).where(
+                    MessageLinkORM.source_message_id.in_(source_message_ids)
+                )
+                rows = await session.execute(stmt)
+                for orm_obj in rows.scalars():
+                    result[orm_obj.source_message_id] = to_message_link_model(orm_obj)
+        except Exception as e:
+            self._logger.error(f"Ошибка при пакетном получении связей сообщений: {e}")
+            try:
+                error_reporter = get_error_reporter()
+                error_reporter.log_error(
+                    error=e,
+                    context={
+                        "operation": "get_links_by_source_ids",
+                        "source_message_ids": source_message_ids
+                    }
+                )
+            except Exception:
+                pass
+        return result
+
     async def save_link(self, link: MessageLink) -> None:
         """Сохранить связь между сообщениями"""
         try:
@@ -256,3 +354,59 @@ class SQLiteMessageLinkRepository(MessageLinkRepository):
             except Exception:
                 pass
             raise
+
+    async def save_links(self, links: list[MessageLink]) -> None:
+        """Сохранить несколько связей между сообщениями одной транзакцией"""
+        if not links:
+            return
+        try:
+            async with self._session_factory() as session:
+                async with session.begin():
+                    insert = _UPSERT_INSERTS.get(session.bind.dialect.name)
+                    if insert is None:
+                        for link in links:
+                            await session.merge(to_message_link_orm(link))
+                    else:
+                        await self._upsert_links(session, insert, links)
+
+            self._logger.debug(f"Сохранено связей сообщений пачкой: {len(links)}")
+        except Exception as e:
+            self._logger.error(f"Ошибка при пакетном сохранении связей сообщений: {e}")
+            try:
+                error_reporter = get_error_reporter()
+                error_reporter.log_error(
+                    error=e,
+                    context={
+                        "operation": "save_links",
+                        "source_message_ids": [link.source_message_id for link in links]
+                    }
+                )
+            except Exception:
+                pass
+            raise
+
+    @staticmethod
+    async def _upsert_links(session: AsyncSession, insert, links: list[MessageLink]) -> None:
+        """Один INSERT ... ON CONFLICT DO UPDATE на пачку строк вместо merge (SELECT + INSERT) на каждую"""
+        rows = [
+            {
+                "source_message_id": link.source_message_id,
+                "source_provider": link.source_provider,
+                "target_provider": link.target_provider,
+                "target_message_id": link.target_message_id,
+                "target_conversation_id": link.target_conversation_id,
+            }
+            for link in links
+        ]
+        for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            stmt = insert(MessageLinkORM).values(rows[start:start + UPSERT_CHUNK_ROWS])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MessageLinkORM.source_message_id],
+                set_={
+                    "source_provider": stmt.excluded.source_provider,
+                    "target_provider": stmt.excluded.target_provider,
+                    "target_message_id": stmt.excluded.target_message_id,
+                    "target_conversation_id": stmt.excluded.target_conversation_id,
+                },
+            )
+            await session.execute(stmt)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import logging.handlers
 import os
@@ -5,123 +6,110 @@ from datetime import datetime
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from presentation.routers.health import router as health_router
-from presentation.routers.webhooks import router as webhooks_router, container
+from presentation.routers.webhooks import router as webhooks_router, setup_container
 from presentation.middleware.logging import log_request_body_middleware
 from infrastructure.http_clients.source_client import AmoCrmSourceProvider
-from infrastructure.db.engine import create_database_engine, init_db
+from infrastructure.db.engine import init_db
 from use_cases.source_manager import SourceManager
 from core.config import settings
+from core.error_logger import JsonErrorFormatter, setup_error_reporting
 import uvicorn
 
-# Создаем директорию для логов
-logs_dir = Path("/app/logs")
-logs_dir.mkdir(exist_ok=True)
+# Уровни логирования для логгеров приложения
+LOGGER_LEVELS: dict[str, int] = {
+	"amocrm.amojo": logging.DEBUG,
+	"amocrm.rest": logging.DEBUG,
+	"edna": logging.DEBUG,
+	"amocrm_webhook": logging.INFO,
+	"request_body_logger": logging.INFO,
+	"use_cases": logging.DEBUG,
+	"message_links_repo": logging.DEBUG,
+}
+
+# Глобальная переменная для доступа к error_logger из других модулей (заполняется в configure_logging)
+ERROR_LOGGER: logging.Logger | None = None
+
+
+def configure_logging() -> None:
+	"""Настраивает логирование и ErrorReporter; вызывается один раз при старте процесса"""
+	global ERROR_LOGGER
+
+	# Создаем директорию для логов
+	logs_dir = Path("/app/logs")
+	logs_dir.mkdir(exist_ok=True)
+
+	# Настраиваем базовое логирование
+	console_handler = logging.StreamHandler()
+	console_handler.setLevel(logging.DEBUG)  # Консоль показывает DEBUG+
+
+	file_handler = logging.handlers.RotatingFileHandler(
+		logs_dir / "app.log",
+		maxBytes=10*1024*1024,  # 10MB
+		backupCount=5,
+		encoding='utf-8'
+	)
+	file_handler.setLevel(logging.WARNING)  # Файлы пишут только WARNING+
+
+	logging.basicConfig(
+		level=logging.DEBUG,  # Корневой уровень DEBUG для всех логгеров
+		format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+		handlers=[
+			console_handler,
+			file_handler
+		]
+	)
 
-# Настраиваем базовое логирование
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)  # Консоль показывает DEBUG+
+	# Настраиваем отдельный логгер для ошибок
+	error_logger = logging.getLogger("error_reports")
+	error_logger.setLevel(logging.ERROR)
 
-file_handler = logging.handlers.RotatingFileHandler(
-    logs_dir / "app.log",
-    maxBytes=10*1024*1024,  # 10MB
-    backupCount=5,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.WARNING)  # Файлы пишут только WARNING+
-
-logging.basicConfig(
-    level=logging.DEBUG,  # Корневой уровень DEBUG для всех логгеров
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-    handlers=[
-        console_handler,
-        file_handler
-    ]
-)
+	# Ошибки пишутся только в JSON (одна запись на строку); для чтения есть scripts/view_error_reports.py
+	json_error_handler = logging.handlers.RotatingFileHandler(
+		logs_dir / "errors.json",
+		maxBytes=50*1024*1024,  # 50MB
+		backupCount=10,
+		encoding='utf-8'
+	)
+	json_error_handler.setFormatter(JsonErrorFormatter())
+	json_error_handler.setLevel(logging.ERROR)
 
-# Настраиваем отдельный логгер для ошибок
-error_logger = logging.getLogger("error_reports")
-error_logger.setLevel(logging.ERROR)
-
-# Создаем форматтер для детального логирования ошибок
-error_formatter = logging.Formatter(
-    fmt="""%(asctime)s - ERROR REPORT
-=====================================
-Logger: %(name)s
-Level: %(levelname)s
-Message: %(message)s
-Module: %(module)s
-Function: %(funcName)s
-Line: %(lineno)d
-Process: %(process)d
-Thread: %(thread)d
-Exception Type: %(exc_info)s
-
---- END ERROR REPORT ---
-""",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+	# Добавляем обработчик к error_logger
+	error_logger.addHandler(json_error_handler)
 
-# FileHandler для ошибок с ротацией по дням
-error_file_handler = logging.handlers.TimedRotatingFileHandler(
-    logs_dir / "errors.log",
-    when="midnight",
-    interval=1,
-    backupCount=30,  # Храним 30 дней
-    encoding='utf-8'
-)
-error_file_handler.setFormatter(error_formatter)
-error_file_handler.setLevel(logging.ERROR)
-
-# JSON форматтер для структурированного логирования
-json_error_formatter = logging.Formatter(
-    '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "logger": "%(name)s", '
-    '"message": "%(message)s", "module": "%(module)s", "function": "%(funcName)s", '
-    '"line": %(lineno)d, "exception": "%(exc_info)s"}'
-)
-json_error_handler = logging.handlers.RotatingFileHandler(
-    logs_dir / "errors.json",
-    maxBytes=50*1024*1024,  # 50MB
-    backupCount=10,
-    encoding='utf-8'
-)
-json_error_handler.setFormatter(json_error_formatter)
-json_error_handler.setLevel(logging.ERROR)
-
-# Добавляем обработчики к error_logger
-error_logger.addHandler(error_file_handler)
-error_logger.addHandler(json_error_handler)
+	# Настраиваем уровни логирования для существующих логгеров
+	for name, level in LOGGER_LEVELS.items():
+		logging.getLogger(name).setLevel(level)
 
-# Настраиваем уровни логирования для существующих логгеров
-logging.getLogger("amocrm.amojo").setLevel(logging.DEBUG)
-logging.getLogger("amocrm.rest").setLevel(logging.DEBUG)
-logging.getLogger("edna").setLevel(logging.DEBUG)
-logging.getLogger("amocrm_webhook").setLevel(logging.INFO)
-logging.getLogger("request_body_logger").setLevel(logging.INFO)
-logging.getLogger("use_cases").setLevel(logging.DEBUG)
-logging.getLogger("message_links_repo").setLevel(logging.DEBUG)
+	# Отключаем propagation для error_logger чтобы избежать дублирования
+	error_logger.propagate = False
 
-# Отключаем propagation для error_logger чтобы избежать дублирования
-error_logger.propagate = False
+	ERROR_LOGGER = error_logger
 
-# Импортируем и инициализируем ErrorReporter
-from core.error_logger import setup_error_reporting
+	# Инициализируем ErrorReporter
+	setup_error_reporting(error_logger)
 
-# Создаем глобальную переменную для доступа к error_logger из других модулей
-ERROR_LOGGER = error_logger
+	logging.getLogger("startup").info("Логирование настроено. Логи сохраняются в директорию: %s", logs_dir.absolute())
 
-# Инициализируем ErrorReporter
-setup_error_reporting(error_logger)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+	# На Python 3.12+ задачи выполняются сразу до первой реальной приостановки,
+	# без лишнего прохода через планировщик; на 3.11 остается стандартная фабрика
+	eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+	if eager_task_factory is not None:
+		asyncio.get_running_loop().set_task_factory(eager_task_factory)
+
+	configure_logging()
+	container = setup_container()
+
 	# Инициализация базы данных, если используется SQLAlchemy
 	if settings.database.use_sqlalchemy_repos:
 		try:
 			logger = logging.getLogger("startup")
 			logger.info("Инициализация базы данных...")
-			engine = create_database_engine(settings.database.url)
-			await init_db(engine)
+			await init_db(container.engine)
 			logger.info("База данных успешно инициализирована")
 		except Exception as e:
 			logger = logging.getLogger("startup")
@@ -148,11 +136,17 @@ async def lifespan(app: FastAPI):
 			logger.error("Ошибка при инициализации источника 'TeMa Edna': %s", str(e))
 			logger.warning("Приложение продолжит работу без источника, но функциональность может быть ограничена")
 
-	yield
+	try:
+		yield
+	finally:
+		await container.aclose()
 
-print(f"Логирование настроено. Логи сохраняются в директорию: {logs_dir.absolute()}")
 
-app = FastAPI(title="edna-amocrm-integration", lifespan=lifespan)
+app = FastAPI(
+	title="edna-amocrm-integration",
+	default_response_class=ORJSONResponse,
+	lifespan=lifespan,
+)
 
 app.middleware("http")(log_request_body_middleware)
 
@@ -6,8 +6,8 @@ logger = logging.getLogger("request_body_logger")
 
 async def log_request_body_middleware(request: Request, call_next):
     body = await request.body()
-    if body:
-        logger.info(f"Request Body: {body.decode('utf-8', errors='ignore')}")
+    if body and logger.isEnabledFor(logging.INFO):
+        logger.info("Request Body: %s", body.decode("utf-8", errors="ignore"))
 
     async def receive():
         return {"type": "http.request", "body": body}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
 from pydantic import BaseModel
-from typing import Union, Optional
+from typing import Optional
 
 from presentation.schemas.edna import EdnaIncomingMessage, EdnaStatusUpdate
 from presentation.schemas.amocrm import AmoIncomingWebhook
@@ -21,9 +21,15 @@ from infrastructure.repositories.sqlalchemy_links import (
 	SQLiteConversationLinkRepository,
 	SQLiteMessageLinkRepository,
 )
+from infrastructure.repositories.cached_links import CachedConversationLinkRepository
+from infrastructure.repositories.outbox_links import OutboxMessageLinkRepository
+from infrastructure.repositories.batching_links import BatchingMessageLinkRepository
 from infrastructure.http_clients.source_client import AmoCrmSourceProvider
+from infrastructure.http_clients.transport import create_shared_transport
 from infrastructure.db.engine import create_database_engine, create_session_factory
 from use_cases.source_manager import SourceManager
+from use_cases.delivery_errors import DeliveryErrorNotifier
+from use_cases.contact_lookup import DelayedContactLookupScheduler
 from core.config import settings
 from core.error_logger import get_error_reporter
 
@@ -31,11 +37,13 @@ router = APIRouter(prefix="/webhooks")
 
 
 import logging
-from fastapi import APIRouter, Depends, Header, HTTPException
-from pydantic import BaseModel
-from typing import Union, Optional
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Optional
 
-from presentation.schemas.edna import EdnaIncomingMessage, EdnaStatusUpdate
+from presentation.schemas.edna import EdnaIncomingMessage, EdnaStatusUpdate, EdnaWebhookPayload
 from presentation.schemas.amocrm import AmoIncomingWebhook
 from use_cases import (
 	RouteMessageFromAmoCrmUseCase,
@@ -50,41 +58,60 @@ from infrastructure.repositories.in_memory_links import (
 	InMemoryMessageLinkRepository,
 )
 from core.config import settings
+from core.log_utils import TruncatedText
 
 router = APIRouter(prefix="/webhooks")
 
+_webhook_logger = logging.getLogger("amocrm_webhook")
+
 
 # --- DI Container ---
 class Container:
 	def __init__(self):
+		# Уровень логгера задается в configure_logging (LOGGER_LEVELS)
 		logger = logging.getLogger("use_cases")
-		logger.setLevel(logging.INFO)
+
+		self.engine = None
 
 		# Выбор репозиториев на основе настроек
 		if settings.database.use_sqlalchemy_repos:
 			logger.info("Используем SQLAlchemy репозитории")
 			# Создаем движок и фабрику сессий
-			engine = create_database_engine(settings.database.url)
-			session_factory = create_session_factory(engine)
+			self.engine = create_database_engine(settings.database.url)
+			session_factory = create_session_factory(self.engine)
 
-			self.conv_link_repo = SQLiteConversationLinkRepository(session_factory)
-			self.msg_link_repo = SQLiteMessageLinkRepository(session_factory)
+			# Связи чатов читаются на каждом вебхуке, поэтому кешируем их в памяти процесса
+			self.conv_link_repo = CachedConversationLinkRepository(
+				SQLiteConversationLinkRepository(session_factory),
+				ttl=settings.database.link_cache_ttl_seconds,
+				negative_ttl=settings.database.link_cache_negative_ttl_seconds,
+				maxsize=settings.database.link_cache_maxsize,
+			)
+			# Связи сообщений пишутся пачками из фонового буфера, а не транзакцией на каждое сообщение;
+			# одновременные чтения (статусы доставки приходят волнами) объединяются в один запрос
+			self.msg_link_repo = OutboxMessageLinkRepository(
+				BatchingMessageLinkRepository(SQLiteMessageLinkRepository(session_factory)),
+				logger=logger,
+			)
 		else:
 			logger.info("Используем InMemory репозитории")
 			self.conv_link_repo = InMemoryConversationLinkRepository()
 			self.msg_link_repo = InMemoryMessageLinkRepository()
-		self.edna_client = EdnaHttpClient(settings=settings.edna)
-		self.amocrm_client = AmoCrmHttpClient(settings=settings.amocrm)
-		self.amocrm_rest_client = AmoCrmRestClient(settings=settings.amocrm)
+		# Все HTTP клиенты используют один пул keep-alive соединений
+		self.http_transport = create_shared_transport()
+		self.edna_client = EdnaHttpClient(settings=settings.edna, transport=self.http_transport)
+		self.amocrm_client = AmoCrmHttpClient(settings=settings.amocrm, transport=self.http_transport)
+		self.amocrm_rest_client = AmoCrmRestClient(settings=settings.amocrm, transport=self.http_transport)
 
 		# Инициализация SourceManager для работы с источниками
-		self.source_provider = AmoCrmSourceProvider(settings=settings.amocrm)
+		self.source_provider = AmoCrmSourceProvider(settings=settings.amocrm, transport=self.http_transport)
 		self.source_manager = SourceManager(
 			source_provider=self.source_provider,
 			amocrm_settings=settings.amocrm,
 			logger=logger,
 		)
 
+		self.contact_lookup = DelayedContactLookupScheduler(self.amocrm_rest_client, logger=logger)
 		self.create_chat_uc = CreateChatUseCase(
 			amocrm_provider=self.amocrm_client,
 			conv_links=self.conv_link_repo,
@@ -94,79 +121,153 @@ class Container:
 		)
 		self.route_from_edna_uc = RouteMessageFromEdnaUseCase(
 			amocrm_provider=self.amocrm_client,
-			amocrm_rest=self.amocrm_rest_client,
+			contact_lookup=self.contact_lookup,
 			conv_links=self.conv_link_repo,
 			msg_links=self.msg_link_repo,
 			create_chat_usecase=self.create_chat_uc if settings.amocrm.auto_create_chats else None,
 			logger=logger,
 		)
+		self.delivery_errors = DeliveryErrorNotifier(self.amocrm_client, logger=logger)
 		self.route_from_amocrm_uc = RouteMessageFromAmoCrmUseCase(
 			edna_provider=self.edna_client,
 			amocrm_provider=self.amocrm_client,
 			conv_links=self.conv_link_repo,
 			msg_links=self.msg_link_repo,
+			delivery_errors=self.delivery_errors,
+			contact_lookup=self.contact_lookup,
 			logger=logger,
 		)
 		self.update_status_uc = UpdateMessageStatusUseCase(
 			amocrm_notifier=self.amocrm_client, msg_links=self.msg_link_repo, logger=logger
 		)
 
+	async def aclose(self) -> None:
+		"""Закрывает HTTP клиенты и соединения с БД"""
+		# Сначала отправляем накопленные статусы ошибок, пока HTTP клиенты открыты
+		await self.delivery_errors.aclose()
+		await self.contact_lookup.aclose()
+		await self.edna_client.aclose()
+		await self.amocrm_client.aclose()
+		await self.amocrm_rest_client.aclose()
+		await self.source_provider.aclose()
+		# Клиенты закрывают транспорт сами, повторное закрытие пула безопасно
+		await self.http_transport.aclose()
+		if isinstance(self.msg_link_repo, OutboxMessageLinkRepository):
+			await self.msg_link_repo.aclose()
+		if self.engine is not None:
+			await self.engine.dispose()
+
+
+# Глобальный контейнер (создается в lifespan приложения через setup_container)
+container: Optional[Container] = None
+
+
+def setup_container() -> Container:
+	"""Создать глобальный DI контейнер"""
+	global container
+	container = Container()
+	return container
+
+
+def get_container() -> Container:
+	"""Получить глобальный DI контейнер"""
+	if container is None:
+		raise RuntimeError("Container not initialized. Call setup_container() first.")
+	return container
+
+
+def get_route_from_amocrm_uc() -> RouteMessageFromAmoCrmUseCase:
+	return get_container().route_from_amocrm_uc
 
-container = Container()
+
+# Валидаторы вебхуков собираются один раз при импорте и переиспользуются во всех запросах
+AMOCRM_ADAPTER = TypeAdapter(AmoIncomingWebhook)
+EDNA_ADAPTER = TypeAdapter(EdnaWebhookPayload)
+EDNA_BATCH_ADAPTER = TypeAdapter(list[EdnaWebhookPayload])
+
+
+async def _validate_body(request: Request, adapter: TypeAdapter):
+	return _validate_json(await request.body(), adapter)
+
+
+def _validate_json(body: bytes, adapter: TypeAdapter):
+	try:
+		return adapter.validate_json(body)
+	except ValidationError as e:
+		# Сохраняем прежний ответ FastAPI (422) на невалидное тело
+		raise RequestValidationError(e.errors(include_url=False))
+
+
+# Обработчики вебхука Edna по типу payload (см. EdnaWebhookPayload)
+EDNA_DISPATCH = {
+	EdnaIncomingMessage.kind: lambda payload: get_container().route_from_edna_uc.execute(payload),
+	EdnaStatusUpdate.kind: lambda payload: get_container().update_status_uc.execute(payload),
+}
 
 
 class Ok(BaseModel):
 	code: str = "ok"
 
 
+# Тело ответа одинаково для всех вебхуков, сериализуем его один раз.
+# response_model=Ok оставлен на роутах только для OpenAPI схемы
+_OK_BODY = orjson.dumps({"code": "ok"})
+
+
+def _ok() -> Response:
+	return Response(content=_OK_BODY, media_type="application/json")
+
+
 @router.get("/edna", response_model=Ok)
 async def edna_webhook_validation():
 	"""Handles Edna webhook validation GET request."""
-	return Ok()
+	return _ok()
 
 
 @router.head("/edna", response_model=Ok)
 async def edna_webhook_validation_head():
 	"""Handles Edna webhook validation HEAD request."""
-	return Ok()
+	return _ok()
 
 
 @router.post("/edna", response_model=Ok)
 async def edna_webhook(
-	payload: Union[EdnaIncomingMessage, EdnaStatusUpdate],
+	request: Request,
 	# В реальном проекте здесь была бы проверка подписи или токена
 	x_auth_token: Optional[str] = Header(None),
-	route_uc: RouteMessageFromEdnaUseCase = Depends(
-		lambda: container.route_from_edna_uc
-	),
-	status_uc: UpdateMessageStatusUseCase = Depends(
-		lambda: container.update_status_uc
-	),
 ):
 	# TODO: Реализовать валидацию вебхука (например, по токену)
 	# if x_auth_token != "some_secret_token":
 	#     raise HTTPException(status_code=403, detail="Forbidden")
 
-	if isinstance(payload, EdnaIncomingMessage):
-		await route_uc.execute(payload)
-	elif isinstance(payload, EdnaStatusUpdate):
-		await status_uc.execute(payload)
-	return Ok()
+	body = await request.body()
+	if body.lstrip()[:1] != b"[":
+		payload = _validate_json(body, EDNA_ADAPTER)
+		await EDNA_DISPATCH[payload.kind](payload)
+		return _ok()
+
+	# Пачка событий: входящие сообщения маршрутизируются одним вызовом, статусы по одному
+	payloads = _validate_json(body, EDNA_BATCH_ADAPTER)
+	incoming = [payload for payload in payloads if payload.kind == EdnaIncomingMessage.kind]
+	if incoming:
+		await get_container().route_from_edna_uc.execute_batch(incoming)
+	for payload in payloads:
+		if payload.kind != EdnaIncomingMessage.kind:
+			await EDNA_DISPATCH[payload.kind](payload)
+	return _ok()
 
 
 @router.post("/amocrm/{secret_key}_{account_id}", response_model=Ok)
 async def amocrm_webhook(
 	secret_key: str,
 	account_id: str,
-	payload: AmoIncomingWebhook,
+	request: Request,
 	# В amoCRM валидация обычно идет по секретному ключу в URL или подписи
-	route_uc: RouteMessageFromAmoCrmUseCase = Depends(
-		lambda: container.route_from_amocrm_uc
-	),
+	route_uc: RouteMessageFromAmoCrmUseCase = Depends(get_route_from_amocrm_uc),
 ):
-	logger = logging.getLogger("amocrm_webhook")
+	payload = await _validate_body(request, AMOCRM_ADAPTER)
 
-	logger.info(
+	_webhook_logger.info(
 		"Получен вебхук от AmoCRM: secret_key=%s, account_id=%s, sender=%s, conversation_id=%s, message_type=%s",
 		secret_key,
 		account_id,
@@ -175,22 +276,22 @@ async def amocrm_webhook(
 		payload.message.message.type
 	)
 
-	logger.debug(
+	_webhook_logger.debug(
 		"Детали вебхука: time=%s, receiver=%s, message_id=%s, text='%s'",
 		payload.time,
 		payload.message.receiver.name,
 		payload.message.message.id,
-		payload.message.message.text[:100] + "..." if payload.message.message.text and len(payload.message.message.text) > 100 else payload.message.message.text
+		TruncatedText(payload.message.message.text, 100),
 	)
 
 	# TODO: Реализовать валидацию вебхука
 	# Можно добавить валидацию secret_key здесь
 	try:
 		await route_uc.execute(payload)
-		logger.info("Вебхук от AmoCRM успешно обработан")
-		return Ok()
+		_webhook_logger.info("Вебхук от AmoCRM успешно обработан")
+		return _ok()
 	except Exception as e:
-		logger.exception("Ошибка при обработке вебхука от AmoCRM: %s", str(e))
+		_webhook_logger.exception("Ошибка при обработке вебхука от AmoCRM: %s", str(e))
 
 		# Создаем детальный отчет об ошибке вебхука
 		try:
@@ -208,7 +309,7 @@ async def amocrm_webhook(
 				message="Webhook processing error from AmoCRM"
 			)
 		except Exception as report_error:
-			logger.error("Не удалось создать отчет об ошибке вебхука: %s", str(report_error))
+			_webhook_logger.error("Не удалось создать отчет об ошибке вебхука: %s", str(report_error))
 
 		# В случае ошибки все равно возвращаем 200, чтобы AmoCRM не повторял запрос
-		return Ok()
+		return _ok()
@@ -1,10 +1,16 @@
 from __future__ import annotations
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from domain.models import ChatSource
 
 
+# Входящие вебхуки только читаются: лишние поля отбрасываем, экземпляры неизменяемы
+_SCHEMA_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
+
 class AmoMessage(BaseModel):
+	model_config = _SCHEMA_CONFIG
+
 	id: str
 	type: str
 	text: Optional[str] = None
@@ -17,22 +23,30 @@ class AmoMessage(BaseModel):
 
 
 class AmoReceiver(BaseModel):
+	model_config = _SCHEMA_CONFIG
+
 	id: str
 	name: str
 	client_id: str
 
 
 class AmoSender(BaseModel):
+	model_config = _SCHEMA_CONFIG
+
 	id: str
 	name: str
 
 
 class AmoConversation(BaseModel):
+	model_config = _SCHEMA_CONFIG
+
 	id: str
 	client_id: str
 
 
 class AmoIncomingMessage(BaseModel):
+	model_config = _SCHEMA_CONFIG
+
 	receiver: AmoReceiver
 	sender: AmoSender
 	conversation: AmoConversation
@@ -43,6 +57,8 @@ class AmoIncomingMessage(BaseModel):
 
 
 class AmoIncomingWebhook(BaseModel):
+	model_config = _SCHEMA_CONFIG
+
 	account_id: str
 	time: int
 	message: AmoIncomingMessage
@@ -1,11 +1,17 @@
 from __future__ import annotations
-from typing import Optional
-from pydantic import BaseModel
+from typing import Annotated, Any, ClassVar, Optional, Union
+from pydantic import BaseModel, ConfigDict, Discriminator, Tag
 from datetime import datetime
 
 
+# Входящие вебхуки только читаются: лишние поля отбрасываем, экземпляры неизменяемы
+_SCHEMA_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
+
 # Model for status updates from Edna Cascade API
 class EdnaPaymentData(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
     type: str
     conversationId: str
     conversationType: str
@@ -14,6 +20,10 @@ class EdnaPaymentData(BaseModel):
 
 
 class EdnaStatusUpdate(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
+    kind: ClassVar[str] = "status"
+
     requestId: str
     messageId: int
     cascadeId: int
@@ -28,11 +38,15 @@ class EdnaStatusUpdate(BaseModel):
 
 # New models for incoming messages based on the provided log
 class EdnaSubscriber(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
     id: int
     identifier: str
 
 
 class EdnaUserInfo(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
     userName: Optional[str] = None
     firstName: Optional[str] = None
     lastName: Optional[str] = None
@@ -40,6 +54,8 @@ class EdnaUserInfo(BaseModel):
 
 
 class EdnaAttachment(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
     url: str
     mimeType: Optional[str] = None
     name: Optional[str] = None
@@ -47,6 +63,8 @@ class EdnaAttachment(BaseModel):
 
 
 class EdnaMessageContent(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
     type: str
     attachment: Optional[EdnaAttachment] = None
     text: Optional[str] = None
@@ -54,6 +72,8 @@ class EdnaMessageContent(BaseModel):
 
 
 class EdnaChannel(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
     id: int
     name: str
     subjectId: Optional[int] = None
@@ -69,6 +89,10 @@ class EdnaChannel(BaseModel):
 
 
 class EdnaIncomingMessage(BaseModel):
+    model_config = _SCHEMA_CONFIG
+
+    kind: ClassVar[str] = "incoming"
+
     id: int
     subject: str
     subjectId: int
@@ -79,3 +103,22 @@ class EdnaIncomingMessage(BaseModel):
     replyOutMessageId: Optional[str] = None
     replyOutMessageExternalRequestId: Optional[str] = None
     replyInMessageId: Optional[str] = None
+
+
+def _edna_payload_kind(value: Any) -> Optional[str]:
+    """Определяет тип вебхука Edna без перебора всех вариантов Union"""
+    if isinstance(value, dict):
+        return EdnaIncomingMessage.kind if "messageContent" in value else EdnaStatusUpdate.kind
+    # null, строка, число: None -> pydantic сам выдаст ValidationError (422), а не AttributeError
+    return getattr(value, "kind", None)
+
+
+# Edna шлет входящие сообщения и статусы на один URL и без поля-тега,
+# поэтому вариант выбирается по наличию messageContent
+EdnaWebhookPayload = Annotated[
+    Union[
+        Annotated[EdnaIncomingMessage, Tag(EdnaIncomingMessage.kind)],
+        Annotated[EdnaStatusUpdate, Tag(EdnaStatusUpdate.kind)],
+    ],
+    Discriminator(_edna_payload_kind),
+]
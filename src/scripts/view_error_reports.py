@@ -4,44 +4,137 @@
 Показывает последние ошибки из файлов логов.
 """
 
-import json
+import argparse
 import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, fields
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
+import orjson
+
+# Начальный размер хвоста errors.json, который читается за один раз
+TAIL_WINDOW_BYTES = 1024 * 1024
+
+
+@dataclass(slots=True, frozen=True)
+class ErrorRecord:
+    """Запись errors.json в компактном виде"""
+
+    timestamp: str
+    level: str = 'UNKNOWN'
+    logger: str = 'UNKNOWN'
+    message: str = 'No message'
+    module: str | None = None
+    function: str | None = None
+    line: int | None = None
+    exception: str | None = None
+    error_info: Dict[str, Any] | None = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ErrorRecord":
+        return cls(
+            timestamp=data['timestamp'],
+            level=data.get('level', 'UNKNOWN'),
+            logger=data.get('logger', 'UNKNOWN'),
+            message=data.get('message', 'No message'),
+            module=data.get('module'),
+            function=data.get('function'),
+            line=data.get('line'),
+            exception=data.get('exception'),
+            error_info=data.get('error_info'),
+        )
+
 
 class ErrorReportsViewer:
     """Класс для просмотра error отчетов"""
 
     def __init__(self, logs_dir: Path = Path("logs")):
         self.logs_dir = logs_dir
-        self.errors_log = logs_dir / "errors.log"
         self.errors_json = logs_dir / "errors.json"
-
-    def get_recent_errors(self, hours: int = 24) -> List[Dict[str, Any]]:
+        # Разобранные ошибки по ключу (часы, mtime_ns, размер файла)
+        self._cache: Dict[tuple[int, int, int], List[ErrorRecord]] = {}
+
+    def _read_tail_lines(self, cutoff_iso: str) -> List[bytes]:
+        """Прочитать хвост файла, покрывающий записи не старше cutoff_iso"""
+        with open(self.errors_json, 'rb') as f:
+            size = f.seek(0, 2)
+            window = TAIL_WINDOW_BYTES
+            while True:
+                start = max(0, size - window)
+                f.seek(start)
+                lines = f.read(size - start).split(b'\n')
+                if start == 0:
+                    return lines
+                # Первая строка окна обрезана посередине
+                del lines[0]
+                # Файл дописывается по порядку: если самая старая запись окна
+                # уже вне интервала, более ранние записи читать не нужно
+                for line in lines:
+                    try:
+                        oldest = orjson.loads(line).get('timestamp', '')
+                    except orjson.JSONDecodeError:
+                        continue
+                    if oldest < cutoff_iso:
+                        return lines
+                    break
+                window *= 2
+
+    def get_recent_errors(self, hours: int = 24) -> List[ErrorRecord]:
         """Получить ошибки за последние N часов"""
-        errors = []
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        try:
+            stat = self.errors_json.stat()
+        except OSError:
+            stat = None
+        # JsonErrorFormatter пишет локальное время в ISO-8601 фиксированной ширины,
+        # такие строки сравниваются лексикографически без построения datetime
+        cutoff_iso = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="milliseconds")
+
+        if stat is not None:
+            cache_key = (hours, stat.st_mtime_ns, stat.st_size)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+            # Окно не шире уже разобранного для того же состояния файла: фильтруем
+            # готовый список (он отсортирован от новых к старым) вместо повторного чтения
+            for (cached_hours, mtime_ns, size), cached in self._cache.items():
+                if cached_hours >= hours and mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+                    errors = []
+                    for error in cached:
+                        if error.timestamp <= cutoff_iso:
+                            break
+                        errors.append(error)
+                    self._cache[cache_key] = errors
+                    return errors
+
+        errors: List[ErrorRecord] = []
 
         # Читаем JSON ошибки
-        if self.errors_json.exists():
+        if stat is not None:
             try:
-                with open(self.errors_json, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.strip():
-                            try:
-                                error_data = json.loads(line.strip())
-                                error_time = datetime.fromisoformat(error_data['timestamp'].replace('Z', '+00:00'))
-                                if error_time > cutoff_time:
-                                    errors.append(error_data)
-                            except json.JSONDecodeError:
-                                continue
-            except Exception as e:
+                lines = self._read_tail_lines(cutoff_iso)
+            except OSError as e:
                 print(f"Ошибка чтения JSON файла: {e}")
-
-        # Сортируем по времени (новые сверху)
-        errors.sort(key=lambda x: x['timestamp'], reverse=True)
+                lines = []
+
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    error_data = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                # Запись строится только для ошибок, попавших в окно
+                if error_data.get('timestamp', '') > cutoff_iso:
+                    errors.append(ErrorRecord.from_dict(error_data))
+
+        # Файл дописывается в хронологическом порядке, поэтому для
+        # "новые сверху" достаточно развернуть список
+        errors.reverse()
+        if stat is not None:
+            self._cache[cache_key] = errors
         return errors
 
     def print_error_summary(self, hours: int = 24) -> None:
@@ -52,32 +145,33 @@ class ErrorReportsViewer:
             print(f"✅ За последние {hours} часов ошибок не найдено!")
             return
 
-        print(f"🚨 Найдено {len(errors)} ошибок за последние {hours} часов:")
-        print("=" * 80)
+        out = [
+            f"🚨 Найдено {len(errors)} ошибок за последние {hours} часов:",
+            "=" * 80,
+        ]
 
-        # Группируем ошибки по типам
-        error_types = {}
+        # Группируем ошибки по типам: считаем все, а храним только первые 5 каждой категории
+        error_counts: Counter[str] = Counter()
+        error_types: defaultdict[str, List[ErrorRecord]] = defaultdict(list)
         for error in errors:
-            error_type = error.get('level', 'UNKNOWN')
-            if error_type not in error_types:
-                error_types[error_type] = []
-            error_types[error_type].append(error)
+            error_type = error.level
+            error_counts[error_type] += 1
+            bucket = error_types[error_type]
+            if len(bucket) < 5:
+                bucket.append(error)
 
         for error_type, type_errors in error_types.items():
-            print(f"\n🔴 {error_type}: {len(type_errors)} ошибок")
-
-            for error in type_errors[:5]:  # Показываем первые 5 каждой категории
-                timestamp = error.get('timestamp', 'UNKNOWN')
-                logger = error.get('logger', 'UNKNOWN')
-                message = error.get('message', 'No message')[:100]
+            out.append(f"\n🔴 {error_type}: {error_counts[error_type]} ошибок")
 
-                print(f"  📅 {timestamp}")
-                print(f"  📍 {logger}")
-                print(f"  💬 {message}")
-                print()
+            for error in type_errors:
+                out.append(f"  📅 {error.timestamp}\n  📍 {error.logger}\n  💬 {error.message[:100]}\n")
 
         if len(errors) > 5:
-            print(f"... и ещё {len(errors) - 5} ошибок")
+            out.append(f"... и ещё {len(errors) - 5} ошибок")
+
+        # Весь отчет выводим одной записью вместо print() на каждую строку
+        out.append("")
+        sys.stdout.write("\n".join(out))
 
     def print_detailed_error(self, error_index: int = 0, hours: int = 24) -> None:
         """Вывести детальную информацию об ошибке"""
@@ -96,7 +190,11 @@ class ErrorReportsViewer:
         print("📋 ДЕТАЛЬНАЯ ИНФОРМАЦИЯ ОБ ОШИБКЕ")
         print("=" * 80)
 
-        for key, value in error.items():
+        for field in fields(error):
+            key = field.name
+            value = getattr(error, key)
+            if key == 'error_info' and value is None:
+                continue
             if key == 'exception' and value:
                 print(f"{key.upper()}:")
                 print(f"  {value}")
@@ -119,51 +217,32 @@ class ErrorReportsViewer:
         print("  python view_error_reports.py detail 1 12   # вторая ошибка за 12 часов")
 
 
-def main():
-    viewer = ErrorReportsViewer()
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Просмотр error отчетов")
+    sub = parser.add_subparsers(dest="command")
 
-    if len(sys.argv) < 2:
-        viewer.print_error_summary()
-        return
+    summary = sub.add_parser("summary", help="сводка ошибок")
+    summary.add_argument("hours", type=int, nargs="?", default=24, help="за сколько часов")
 
-    command = sys.argv[1].lower()
+    detail = sub.add_parser("detail", help="детальная ошибка")
+    detail.add_argument("index", type=int, nargs="?", default=0, help="индекс ошибки (0 - самая новая)")
+    detail.add_argument("hours", type=int, nargs="?", default=24, help="за сколько часов")
 
-    if command == "summary":
-        hours = 24
-        if len(sys.argv) > 2:
-            try:
-                hours = int(sys.argv[2])
-            except ValueError:
-                print("Ошибка: часы должны быть числом")
-                return
-        viewer.print_error_summary(hours)
+    sub.add_parser("help", help="справка")
+    return parser
 
-    elif command == "detail":
-        error_index = 0
-        hours = 24
 
-        if len(sys.argv) > 2:
-            try:
-                error_index = int(sys.argv[2])
-            except ValueError:
-                print("Ошибка: индекс должен быть числом")
-                return
-
-        if len(sys.argv) > 3:
-            try:
-                hours = int(sys.argv[3])
-            except ValueError:
-                print("Ошибка: часы должны быть числом")
-                return
-
-        viewer.print_detailed_error(error_index, hours)
-
-    elif command == "help":
-        viewer.show_help()
-
-    else:
-        print(f"Неизвестная команда: {command}")
-        viewer.show_help()
+def main():
+    viewer = ErrorReportsViewer()
+    args = build_parser().parse_args()
+
+    commands = {
+        None: lambda: viewer.print_error_summary(),
+        "summary": lambda: viewer.print_error_summary(args.hours),
+        "detail": lambda: viewer.print_detailed_error(args.index, args.hours),
+        "help": viewer.show_help,
+    }
+    commands[args.command]()
 
 
 if __name__ == "__main__":
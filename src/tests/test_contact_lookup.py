@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from use_cases.contact_lookup import (
+    CONTACT_LOOKUP_BUCKET_SECONDS,
+    CONTACT_LOOKUP_DELAY_SECONDS,
+    DelayedContactLookupScheduler,
+)
+
+
+class _NoContactsProvider:
+    async def get_contact_links(self, contacts_id=None, chats_id=None):
+        return {}
+
+    async def update_contact_phone(self, contact_id, phone_e164, enum_code="WORK"):
+        pass
+
+
+def test_lookup_is_due_within_one_bucket_after_delay():
+    async def scenario():
+        scheduler = DelayedContactLookupScheduler(_NoContactsProvider())
+        before = time.monotonic()
+        scheduler.add("chat-1", "79001234567", "m-1")
+        after = time.monotonic()
+        (bucket,) = scheduler._buckets
+        await scheduler.aclose()
+        return before, after, bucket * CONTACT_LOOKUP_BUCKET_SECONDS
+
+    before, after, due = asyncio.run(scenario())
+
+    # Не раньше задержки (контакт еще не привязан) и не позже задержки плюс ширина корзины
+    assert due >= before + CONTACT_LOOKUP_DELAY_SECONDS
+    assert due <= after + CONTACT_LOOKUP_DELAY_SECONDS + CONTACT_LOOKUP_BUCKET_SECONDS
@@ -0,0 +1,15 @@
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from presentation.schemas.edna import EdnaWebhookPayload
+
+
+@pytest.mark.parametrize("body", [b"null", b'"x"', b"1"])
+def test_non_object_payload_is_validation_error(body):
+    with pytest.raises(ValidationError):
+        TypeAdapter(EdnaWebhookPayload).validate_json(body)
+
+
+def test_non_object_batch_item_is_validation_error():
+    with pytest.raises(ValidationError):
+        TypeAdapter(list[EdnaWebhookPayload]).validate_json(b"[1]")
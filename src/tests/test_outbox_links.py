@@ -0,0 +1,50 @@
+import asyncio
+
+from domain.models import MessageLink, ProviderName
+from infrastructure.repositories.outbox_links import OutboxMessageLinkRepository
+
+
+def _link(source_message_id: str) -> MessageLink:
+    return MessageLink(
+        source_provider=ProviderName.amocrm,
+        source_message_id=source_message_id,
+        target_provider=ProviderName.edna,
+        target_message_id=f"t-{source_message_id}",
+        target_conversation_id="conv-1",
+    )
+
+
+class _FailOnceRepository:
+    """Внутренний репозиторий, у которого первая запись падает"""
+
+    def __init__(self):
+        self.saved: dict[str, MessageLink] = {}
+        self.calls = 0
+
+    async def save_links(self, links: list[MessageLink]) -> None:
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("database is locked")
+        for link in links:
+            self.saved[link.source_message_id] = link
+
+
+def test_failed_flush_is_retried():
+    async def scenario():
+        inner = _FailOnceRepository()
+        repo = OutboxMessageLinkRepository(inner)
+        await repo.save_links([_link("m-1"), _link("m-2")])
+
+        await repo.flush()
+        # Запись упала: связи остались в буфере и по-прежнему читаются
+        assert inner.saved == {}
+        assert (await repo.get_link_by_source_id("m-1")).target_message_id == "t-m-1"
+
+        await repo.flush()
+        await repo.aclose()
+        return inner
+
+    inner = asyncio.run(scenario())
+
+    assert inner.calls == 2
+    assert set(inner.saved) == {"m-1", "m-2"}
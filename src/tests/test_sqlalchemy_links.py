@@ -0,0 +1,39 @@
+import asyncio
+
+from domain.models import MessageLink, ProviderName
+from infrastructure.db.engine import create_database_engine, create_session_factory
+from infrastructure.db.models import Base
+from infrastructure.repositories.sqlalchemy_links import SQLiteMessageLinkRepository
+
+
+def _link(source_message_id: str, target_message_id: str) -> MessageLink:
+    return MessageLink(
+        source_provider=ProviderName.amocrm,
+        source_message_id=source_message_id,
+        target_provider=ProviderName.edna,
+        target_message_id=target_message_id,
+        target_conversation_id="conv-1",
+    )
+
+
+def test_save_links_updates_conflicting_key(tmp_path):
+    async def scenario():
+        engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path / 'links.db'}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            repo = SQLiteMessageLinkRepository(create_session_factory(engine))
+
+            await repo.save_links([_link("m-1", "t-1"), _link("m-2", "t-2")])
+            # m-1 уже есть в таблице: строка должна обновиться, а не упасть на PRIMARY KEY
+            await repo.save_links([_link("m-1", "t-1-new"), _link("m-3", "t-3")])
+
+            return await repo.get_links_by_source_ids(["m-1", "m-2", "m-3"])
+        finally:
+            await engine.dispose()
+
+    links = asyncio.run(scenario())
+
+    assert links["m-1"].target_message_id == "t-1-new"
+    assert links["m-2"].target_message_id == "t-2"
+    assert links["m-3"].target_message_id == "t-3"
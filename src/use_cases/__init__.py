@@ -1,12 +1,28 @@
-from .route_messages import (
-	RouteMessageFromEdnaUseCase,
-	RouteMessageFromAmoCrmUseCase,
-	ConversationLinkRepository,
-	MessageLinkRepository,
-)
-from .update_status import UpdateMessageStatusUseCase
-from .create_chat import CreateChatUseCase
-from .source_manager import SourceManager
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+	from .route_messages import (
+		RouteMessageFromEdnaUseCase,
+		RouteMessageFromAmoCrmUseCase,
+		ConversationLinkRepository,
+		MessageLinkRepository,
+	)
+	from .update_status import UpdateMessageStatusUseCase
+	from .create_chat import CreateChatUseCase
+	from .source_manager import SourceManager
+
+# Подмодули импортируются при первом обращении к имени (PEP 562),
+# чтобы импорт use_cases.mappers и т.п. не тянул за собой все use case
+_LAZY = {
+	"RouteMessageFromEdnaUseCase": "route_messages",
+	"RouteMessageFromAmoCrmUseCase": "route_messages",
+	"ConversationLinkRepository": "route_messages",
+	"MessageLinkRepository": "route_messages",
+	"UpdateMessageStatusUseCase": "update_status",
+	"CreateChatUseCase": "create_chat",
+	"SourceManager": "source_manager",
+}
 
 __all__ = [
 	"RouteMessageFromEdnaUseCase",
@@ -17,3 +33,13 @@ __all__ = [
 	"ConversationLinkRepository",
 	"MessageLinkRepository",
 ]
+
+
+def __getattr__(name: str) -> Any:
+	try:
+		module_name = _LAZY[name]
+	except KeyError:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+	value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+	globals()[name] = value
+	return value
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Optional, Protocol, TypedDict
+
+from domain.phone import normalize_ru_phone
+
+# AmoCRM привязывает контакт к чату не сразу, поэтому ищем его не раньше чем через столько секунд
+CONTACT_LOOKUP_DELAY_SECONDS = 10.0
+# Ширина корзины: поиск выполняется через DELAY..DELAY+BUCKET секунд после добавления
+CONTACT_LOOKUP_BUCKET_SECONDS = 1.0
+# Сколько чатов запрашиваем в одном вызове /api/v4/contacts/chats
+CONTACT_LOOKUP_BATCH_SIZE = 50
+# Сколько чатов с уже обновленным телефоном контакта помним
+PUSHED_PHONES_MAXSIZE = 10_000
+
+
+class ContactChatLink(TypedDict, total=False):
+	chat_id: str
+	contact_id: int
+
+
+class _ContactLinksEmbedded(TypedDict, total=False):
+	chats: list[ContactChatLink]
+
+
+class ContactLinksResponse(TypedDict, total=False):
+	"""Ответ /api/v4/contacts/chats (используемые поля)"""
+	_total_items: int
+	_embedded: _ContactLinksEmbedded
+
+
+class ContactLinksProvider(Protocol):
+	async def get_contact_links(self, contacts_id: list[int] = None, chats_id: list[str] = None) -> ContactLinksResponse: ...
+	async def update_contact_phone(self, contact_id: int, phone_e164: str, enum_code: str = "WORK") -> None: ...
+
+
+class DelayedContactLookupScheduler:
+	"""
+	Откладывает поиск контакта по чату AmoCRM и выполняет его пачками.
+
+	Чаты раскладываются по корзинам длиной CONTACT_LOOKUP_BUCKET_SECONDS по времени
+	готовности (добавление + CONTACT_LOOKUP_DELAY_SECONDS); когда корзина истекает,
+	один фоновый воркер запрашивает связи всех ее чатов одним вызовом и обновляет
+	телефоны найденных контактов параллельно. Если по чату
+	пришло событие из AmoCRM (trigger), поиск выполняется сразу, не дожидаясь корзины.
+	"""
+
+	def __init__(
+		self,
+		amocrm_rest: ContactLinksProvider,
+		logger: Optional[logging.Logger] = None,
+	) -> None:
+		self._amocrm_rest = amocrm_rest
+		self._logger = logger or logging.getLogger(__name__)
+		# номер корзины -> {chat_id: (phone, message_id)}
+		self._buckets: dict[int, dict[str, tuple[str, str]]] = {}
+		self._wakeup = asyncio.Event()
+		self._task: Optional[asyncio.Task] = None
+		# chat_id -> телефон, уже записанный в контакт этого чата
+		self._pushed: dict[str, str] = {}
+
+	def add(self, conversation_id: str, phone_number: str, message_id: str) -> None:
+		"""Планирует поиск контакта для чата; воркер запускается при первом вызове"""
+		# Повторные сообщения того же клиента: телефон контакта уже обновлен, запрос не нужен
+		if self._pushed.get(conversation_id) == normalize_ru_phone(phone_number):
+			return
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+		# Корзина истекает не раньше чем через CONTACT_LOOKUP_DELAY_SECONDS после добавления
+		# и не позже чем еще через CONTACT_LOOKUP_BUCKET_SECONDS
+		bucket = math.ceil((time.monotonic() + CONTACT_LOOKUP_DELAY_SECONDS) / CONTACT_LOOKUP_BUCKET_SECONDS)
+		self._buckets.setdefault(bucket, {})[conversation_id] = (phone_number, message_id)
+		self._wakeup.set()
+
+	def trigger(self, conversation_id: str) -> None:
+		"""
+		Выполняет отложенный поиск контакта для чата без ожидания: вебхук AmoCRM
+		по чату означает, что чат (а с ним и контакт) в AmoCRM уже существует.
+		"""
+		for bucket, entries in self._buckets.items():
+			entry = entries.pop(conversation_id, None)
+			if entry is not None:
+				break
+		else:
+			return
+		if not entries:
+			del self._buckets[bucket]
+		# Корзина 0 уже истекла, воркер заберет ее первой
+		self._buckets.setdefault(0, {})[conversation_id] = entry
+		self._wakeup.set()
+
+	async def _run(self) -> None:
+		while True:
+			if not self._buckets:
+				self._wakeup.clear()
+				await self._wakeup.wait()
+				continue
+
+			bucket = min(self._buckets)
+			delay = bucket * CONTACT_LOOKUP_BUCKET_SECONDS - time.monotonic()
+			if delay > 0:
+				# Ждем истечения корзины, но просыпаемся раньше на add/trigger
+				self._wakeup.clear()
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), delay)
+				except asyncio.TimeoutError:
+					pass
+				continue
+
+			entries = self._buckets.pop(bucket)
+			try:
+				await self._process(entries)
+			except Exception as e:
+				self._logger.exception("Ошибка при пакетном поиске контактов (%d чатов): %s", len(entries), str(e))
+
+	async def _process(self, entries: dict[str, tuple[str, str]]) -> None:
+		chat_ids = list(entries)
+		self._logger.info("Начинаем поиск контактов для %d чатов", len(chat_ids))
+
+		contact_by_chat: dict[str, int] = {}
+		for start in range(0, len(chat_ids), CONTACT_LOOKUP_BATCH_SIZE):
+			contact_links = await self._amocrm_rest.get_contact_links(
+				chats_id=chat_ids[start:start + CONTACT_LOOKUP_BATCH_SIZE]
+			)
+			# В ответе _embedded/chats могут отсутствовать или быть null
+			embedded = contact_links.get("_embedded") or {}
+			for contact_link in embedded.get("chats") or ():
+				contact_id = contact_link.get("contact_id")
+				if contact_id:
+					contact_by_chat[contact_link.get("chat_id")] = contact_id
+
+		updates: dict[str, tuple[str, Awaitable[None]]] = {}
+		for chat_id, (phone_number, message_id) in entries.items():
+			contact_id = contact_by_chat.get(chat_id)
+			if contact_id is None:
+				self._logger.warning(
+					"Контакт не найден для conversation_id=%s (message_id=%s)", chat_id, message_id
+				)
+				continue
+			phone_e164 = normalize_ru_phone(phone_number)
+			self._logger.info(
+				"Найден контакт id=%s для чата id=%s, телефон: '%s' -> '%s'",
+				contact_id, chat_id, phone_number, phone_e164
+			)
+			updates[chat_id] = (phone_e164, self._amocrm_rest.update_contact_phone(contact_id, phone_e164))
+
+		results = await asyncio.gather(*(update for _, update in updates.values()), return_exceptions=True)
+		for (chat_id, (phone_e164, _)), result in zip(updates.items(), results):
+			if isinstance(result, BaseException):
+				self._logger.error(
+					"Не удалось обновить телефон контакта для conversation_id=%s: %s", chat_id, str(result)
+				)
+			else:
+				self._remember_pushed(chat_id, phone_e164)
+
+	def _remember_pushed(self, chat_id: str, phone_e164: str) -> None:
+		"""Запоминает обновленный телефон, вытесняя самую старую запись при переполнении"""
+		self._pushed.pop(chat_id, None)
+		if len(self._pushed) >= PUSHED_PHONES_MAXSIZE:
+			del self._pushed[next(iter(self._pushed))]
+		self._pushed[chat_id] = phone_e164
+
+	async def aclose(self) -> None:
+		"""Останавливает воркер; еще не истекшие поиски отбрасываются"""
+		if self._task is None:
+			return
+		pending = sum(len(entries) for entries in self._buckets.values())
+		if pending:
+			self._logger.warning("Остановка: не выполнен поиск контактов для %d чатов", pending)
+		self._task.cancel()
+		try:
+			await self._task
+		except asyncio.CancelledError:
+			pass
+		self._task = None
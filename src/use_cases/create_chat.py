@@ -1,4 +1,5 @@
 import logging
+import time
 from typing import Protocol, Optional
 from domain.models import (
     ChatCreationRequest,
@@ -8,18 +9,24 @@ from domain.models import (
     ChatSource,
     ConversationLink,
 )
-from domain.ports.message_provider import MessageProvider
+from domain.ports.message_provider import ChatCreator
 from core.config import AmoCrmSettings
 from core.error_logger import get_error_reporter
 from .source_manager import SourceManager
 
+# Сколько живет запись кеша "телефон -> chat_id" и сколько записей храним
+PHONE_CACHE_TTL_SECONDS = 60.0
+PHONE_CACHE_MAXSIZE = 10_000
+
 
 class ConversationLinkRepository(Protocol):
     async def get_edna_conversation_id(self, amocrm_chat_id: str) -> str | None: ...
     async def get_amocrm_chat_id(self, edna_conversation_id: str) -> str | None: ...
     async def get_phone_by_chat_id(self, amocrm_chat_id: str) -> str | None: ...
+    async def get_chat_id_by_phone(self, phone_number: str) -> str | None: ...
     async def save_link(self, link: ConversationLink) -> None: ...
     async def save_phone_for_chat(self, amocrm_chat_id: str, phone_number: str) -> None: ...
+    async def save_link_with_phone(self, link: ConversationLink, phone_number: str) -> None: ...
 
 
 class CreateChatUseCase:
@@ -35,17 +42,24 @@ class CreateChatUseCase:
 
     def __init__(
         self,
-        amocrm_provider: MessageProvider,
+        amocrm_provider: ChatCreator,
         conv_links: ConversationLinkRepository,
         amocrm_settings: AmoCrmSettings,
         source_manager: SourceManager,
         logger: Optional[logging.Logger] = None,
     ) -> None:
         self._amocrm_provider = amocrm_provider
+        # Метод создания чата резолвим один раз: провайдер без него не подходит для use case
+        self._create_chat = getattr(amocrm_provider, "create_chat", None)
+        if self._create_chat is None:
+            raise TypeError("AmoCRM provider does not support chat creation")
         self._conv_links = conv_links
         self._amocrm_settings = amocrm_settings
         self._source_manager = source_manager
         self._logger = logger or logging.getLogger(__name__)
+        # phone -> (monotonic время истечения, chat_id); кешируем только найденные чаты,
+        # чтобы чат, созданный в обход этого use case, не прятался за кешированным промахом
+        self._phone_cache: dict[str, tuple[float, str]] = {}
 
     async def execute(
         self,
@@ -65,12 +79,13 @@ class CreateChatUseCase:
         Returns:
             ChatCreationResult: Результат создания чата
         """
-        self._logger.debug(
-            "Начало создания чата: edna_conversation_id=%s, phone=%s, user_name=%s",
-            edna_conversation_id,
-            phone_number,
-            user_name
-        )
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                "Начало создания чата: edna_conversation_id=%s, phone=%s, user_name=%s",
+                edna_conversation_id,
+                phone_number,
+                user_name
+            )
 
         # Проверяем, есть ли уже чат для этого номера телефона
         existing_chat_id = await self._find_existing_chat_by_phone(phone_number)
@@ -83,19 +98,19 @@ class CreateChatUseCase:
             )
 
             # Сохраняем связь между Edna conversation и существующим AmoCRM чатом
-            link = ConversationLink(
+            link = ConversationLink.model_construct(
                 edna_conversation_id=edna_conversation_id,
                 amocrm_chat_id=existing_chat_id,
             )
             await self._conv_links.save_link(link)
 
             # Возвращаем результат с существующим чатом
-            return ChatCreationResult(
+            return ChatCreationResult.model_construct(
                 id=existing_chat_id,
-                user=ChatUser(
+                user=ChatUser.model_construct(
                     id=f"user_{phone_number}",
                     name=user_name or phone_number,
-                    profile=ChatUserProfile(phone=phone_number)
+                    profile=ChatUserProfile.model_construct(phone=phone_number)
                 ),
                 conversation_id=edna_conversation_id
             )
@@ -110,13 +125,13 @@ class CreateChatUseCase:
         user_id = f"edna_{phone_number}"  # Уникальный ID для пользователя
         user_name_final = user_name or f"Клиент {phone_number}"
 
-        user = ChatUser(
+        user = ChatUser.model_construct(
             id=user_id,
             name=user_name_final,
-            profile=ChatUserProfile(phone=phone_number)
+            profile=ChatUserProfile.model_construct(phone=phone_number)
         )
 
-        request = ChatCreationRequest(
+        request = ChatCreationRequest.model_construct(
             conversation_id=edna_conversation_id,
             user=user
         )
@@ -125,19 +140,15 @@ class CreateChatUseCase:
         try:
             tema_edna_source = await self._source_manager.ensure_tema_edna_source_exists()
             request.source = ChatSource(external_id=tema_edna_source.external_id)
-            self._logger.debug("Используем источник 'TeMa Edna' с external_id: %s", tema_edna_source.external_id)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("Используем источник 'TeMa Edna' с external_id: %s", tema_edna_source.external_id)
         except Exception as e:
             self._logger.warning("Не удалось получить источник 'TeMa Edna', создаем чат без источника: %s", str(e))
             # Продолжаем без источника, если не удалось его получить
 
         # Создаем чат через AmoCRM провайдер
-        # Примечание: нам нужно добавить метод create_chat в интерфейс MessageProvider
-        # или использовать прямой доступ к AmoCrmHttpClient
         try:
-            if hasattr(self._amocrm_provider, 'create_chat'):
-                result = await self._amocrm_provider.create_chat(request)
-            else:
-                raise AttributeError("AmoCRM provider does not support chat creation")
+            result = await self._create_chat(request)
         except Exception as e:
             self._logger.error(
                 "Failed to create chat in AmoCRM for phone=%s: %s",
@@ -160,14 +171,14 @@ class CreateChatUseCase:
             raise
 
         # Сохраняем связь между Edna conversation и новым AmoCRM чатом
-        link = ConversationLink(
+        link = ConversationLink.model_construct(
             edna_conversation_id=edna_conversation_id,
             amocrm_chat_id=result.id,
         )
-        await self._conv_links.save_link(link)
-
-        # Сохраняем номер телефона для чата
-        await self._conv_links.save_phone_for_chat(result.id, phone_number)
+        # Связь и номер телефона пишем одной операцией: save_phone_for_chat обновляет
+        # существующую строку, поэтому запускать его параллельно с save_link нельзя
+        await self._conv_links.save_link_with_phone(link, phone_number)
+        self._remember_chat(phone_number, result.id)
 
         self._logger.info(
             "Чат успешно создан и связан: edna_conversation_id=%s -> amocrm_chat_id=%s, phone=%s",
@@ -188,5 +199,22 @@ class CreateChatUseCase:
         Returns:
             ID чата в AmoCRM или None, если чат не найден
         """
+        cached = self._phone_cache.get(phone_number)
+        if cached is not None:
+            expires_at, chat_id = cached
+            if expires_at > time.monotonic():
+                return chat_id
+            del self._phone_cache[phone_number]
+
         # Используем репозиторий для поиска существующего чата по номеру телефона
-        return await self._conv_links.get_chat_id_by_phone(phone_number)
+        chat_id = await self._conv_links.get_chat_id_by_phone(phone_number)
+        if chat_id:
+            self._remember_chat(phone_number, chat_id)
+        return chat_id
+
+    def _remember_chat(self, phone_number: str, chat_id: str) -> None:
+        """Кладет chat_id в кеш по номеру телефона, вытесняя самую старую запись при переполнении"""
+        self._phone_cache.pop(phone_number, None)
+        if len(self._phone_cache) >= PHONE_CACHE_MAXSIZE:
+            del self._phone_cache[next(iter(self._phone_cache))]
+        self._phone_cache[phone_number] = (time.monotonic() + PHONE_CACHE_TTL_SECONDS, chat_id)
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Optional, Protocol
+
+from core.error_logger import get_error_reporter
+
+# Сколько уведомлений может ждать отправки и сколько ждем их при остановке
+QUEUE_MAXSIZE = 1000
+DRAIN_TIMEOUT_SECONDS = 5.0
+
+
+class DeliveryErrorProvider(Protocol):
+	async def notify_delivery_error(self, message_id: str, error_code: int = 903, error_text: str = "") -> None: ...
+
+
+class DeliveryErrorNotifier:
+	"""
+	Отправляет статусы ошибок доставки в AmoCRM в фоновой задаче,
+	чтобы обработчик упавшего сообщения не ждал сетевой вызов.
+	"""
+
+	def __init__(
+		self,
+		amocrm_provider: DeliveryErrorProvider,
+		logger: Optional[logging.Logger] = None,
+	) -> None:
+		self._amocrm_provider = amocrm_provider
+		self._logger = logger or logging.getLogger(__name__)
+		self._queue: asyncio.Queue[tuple[str, int, str]] = asyncio.Queue(QUEUE_MAXSIZE)
+		self._task: Optional[asyncio.Task] = None
+
+	def submit(self, message_id: str, error_code: int, error_text: str) -> None:
+		"""Ставит уведомление в очередь; воркер запускается при первом вызове"""
+		if self._task is None:
+			self._task = asyncio.create_task(self._drain())
+		try:
+			self._queue.put_nowait((message_id, error_code, error_text))
+		except asyncio.QueueFull:
+			self._logger.error(
+				"Очередь статусов ошибок переполнена, статус не отправлен: message_id=%s, error_code=%s",
+				message_id, error_code
+			)
+
+	async def _drain(self) -> None:
+		while True:
+			message_id, error_code, error_text = await self._queue.get()
+			try:
+				await self._notify(message_id, error_code, error_text)
+			finally:
+				self._queue.task_done()
+
+	async def _notify(self, message_id: str, error_code: int, error_text: str) -> None:
+		try:
+			await self._amocrm_provider.notify_delivery_error(
+				message_id=message_id,
+				error_code=error_code,
+				error_text=error_text
+			)
+		except Exception as notify_error:
+			self._logger.error(
+				"Не удалось отправить статус ошибки в AmoCRM: %s", str(notify_error)
+			)
+			# Логируем и эту ошибку в error_reports
+			try:
+				get_error_reporter().log_delivery_status_error(
+					error=notify_error,
+					provider="amocrm",
+					message_id=message_id,
+					error_details="Failed to send delivery error status"
+				)
+			except Exception as report_error:
+				self._logger.error("Не удалось создать отчет об ошибке отправки статуса: %s", str(report_error))
+
+	async def aclose(self) -> None:
+		"""Дожидается отправки накопленных уведомлений и останавливает воркер"""
+		if self._task is None:
+			return
+		try:
+			await asyncio.wait_for(self._queue.join(), DRAIN_TIMEOUT_SECONDS)
+		except asyncio.TimeoutError:
+			self._logger.warning(
+				"Не все статусы ошибок отправлены при остановке: осталось %d", self._queue.qsize()
+			)
+		self._task.cancel()
+		try:
+			await self._task
+		except asyncio.CancelledError:
+			pass
+		self._task = None
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from uuid import uuid4
 from domain.models import (
 	Message,
@@ -11,51 +11,67 @@ from domain.models import (
 )
 from presentation.schemas.amocrm import AmoIncomingWebhook
 
+# Значения enum, используемые на каждом вебхуке, резолвим один раз
+_CT_TEXT = MessageContentType.text
+_CT_IMAGE = MessageContentType.image
+_CT_FILE = MessageContentType.file
+_PROV_AMO = ProviderName.amocrm
+_PROV_EDNA = ProviderName.edna
+_ROLE_AGENT = ParticipantRole.agent
+_ROLE_CLIENT = ParticipantRole.client
+_DIR_OUT = MessageDirection.outbound
+_UTC = timezone.utc
+
+_AMO_TYPE_MAP = {
+	"file": _CT_FILE,
+	"document": _CT_FILE,
+	"image": _CT_IMAGE,
+	"picture": _CT_IMAGE,
+}
+
 
 def amocrm_to_domain(payload: AmoIncomingWebhook) -> Message:
-	content_type = MessageContentType.text
+	# Данные уже провалидированы схемой вебхука, поэтому модели собираем без повторной валидации
 	attachment = None
 
-	amo_type = (payload.message.message.type or "").lower()
-	if amo_type in ("file", "document"):
-		content_type = MessageContentType.file
-	elif amo_type in ("image", "picture"):
-		content_type = MessageContentType.image
-	else:
-		content_type = MessageContentType.text
+	amo_type = payload.message.message.type or ""
+	content_type = _AMO_TYPE_MAP.get(amo_type)
+	if content_type is None:
+		# amoCRM присылает тип в нижнем регистре, lower() нужен только для остальных случаев
+		content_type = _AMO_TYPE_MAP.get(amo_type.lower(), _CT_TEXT)
 
 	if payload.message.message.media:
-		attachment = Attachment(
+		attachment = Attachment.model_construct(
 			url=payload.message.message.media,
 			mime_type=None,
 			filename=payload.message.message.file_name,
 			size_bytes=payload.message.message.file_size,
 		)
 
-	sender = Participant(
+	sender = Participant.model_construct(
 		provider_user_id=payload.message.sender.id,
-		role=ParticipantRole.agent,
+		role=_ROLE_AGENT,
 		display_name=payload.message.sender.name,
 	)
 
 	recipient_provider_id = payload.message.receiver.client_id
-	recipient = Participant(
+	recipient = Participant.model_construct(
 		provider_user_id=recipient_provider_id,
-		role=ParticipantRole.client,
+		role=_ROLE_CLIENT,
 		display_name=payload.message.receiver.name,
 	)
 
-	return Message(
-		id=str(uuid4()),
-		direction=MessageDirection.outbound,
+	return Message.model_construct(
+		id=uuid4().hex,
+		direction=_DIR_OUT,
 		content_type=content_type,
 		text=payload.message.message.text,
 		attachment=attachment,
-		source_provider=ProviderName.amocrm,
+		source_provider=_PROV_AMO,
 		source_conversation_id=payload.message.conversation.id,
 		source_message_id=payload.message.message.id,
-		target_provider=ProviderName.edna,
-		sent_at=datetime.fromtimestamp(payload.message.timestamp),
+		target_provider=_PROV_EDNA,
+		sent_at=datetime.fromtimestamp(payload.message.timestamp, _UTC),
 		sender=sender,
 		recipient=recipient,
 	)
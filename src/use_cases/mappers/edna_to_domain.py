@@ -13,59 +13,77 @@ from domain.models import (
 )
 from presentation.schemas.edna import EdnaIncomingMessage, EdnaStatusUpdate
 
+# Значения enum, используемые на каждом вебхуке, резолвим один раз
+_CT_TEXT = MessageContentType.text
+_CT_IMAGE = MessageContentType.image
+_CT_FILE = MessageContentType.file
+_PROV_AMO = ProviderName.amocrm
+_PROV_EDNA = ProviderName.edna
+_ROLE_AGENT = ParticipantRole.agent
+_ROLE_CLIENT = ParticipantRole.client
+_DIR_IN = MessageDirection.inbound
+_STATUS_SENT = MessageStatus.sent
+
+_EDNA_TYPE_MAP = {
+	"IMAGE": _CT_IMAGE,
+	"DOCUMENT": _CT_FILE,
+	"FILE": _CT_FILE,
+}
+
+_EDNA_STATUS_MAP = {
+	"SENT": _STATUS_SENT,
+	"DELIVERED": MessageStatus.delivered,
+	"READ": MessageStatus.read,
+}
+
 
 def edna_message_to_domain(payload: EdnaIncomingMessage) -> Message:
-	content_type = MessageContentType.text
-	attachment = None
+	# Данные уже провалидированы схемой вебхука, поэтому модели собираем без повторной валидации
 	message_content = payload.messageContent
+	edna_attachment = message_content.attachment
 
-	# Определяем тип контента сначала по явному типу из Edna
-	content_type_upper = (message_content.type or "").upper()
-
-	if message_content.attachment:
-		if content_type_upper == "IMAGE":
-			content_type = MessageContentType.image
-		elif content_type_upper in ("DOCUMENT", "FILE"):
-			content_type = MessageContentType.file
-		else:
+	if edna_attachment:
+		# Определяем тип контента сначала по явному типу из Edna
+		content_type = _EDNA_TYPE_MAP.get(message_content.type) or _EDNA_TYPE_MAP.get(message_content.type.upper())
+		if content_type is None:
 			# Fallback по mimeType, если тип не задан явным образом
-			content_type = (
-				MessageContentType.image
-				if "image" in (message_content.attachment.mimeType or "")
-				else MessageContentType.file
-			)
-		attachment = Attachment(
-			url=message_content.attachment.url,
-			mime_type=message_content.attachment.mimeType,
-			filename=message_content.attachment.name,
-			size_bytes=message_content.attachment.size,
+			mime_type = edna_attachment.mimeType or ""
+			content_type = _CT_IMAGE if mime_type.startswith("image/") else _CT_FILE
+		attachment = Attachment.model_construct(
+			url=edna_attachment.url,
+			mime_type=edna_attachment.mimeType,
+			filename=edna_attachment.name,
+			size_bytes=edna_attachment.size,
 		)
+	else:
+		content_type = _CT_TEXT
+		attachment = None
 
-	sender = Participant(
+	sender = Participant.model_construct(
 		provider_user_id=payload.subscriber.identifier,  # Use identifier (phone number)
-		role=ParticipantRole.client,
+		role=_ROLE_CLIENT,
 		display_name=payload.userInfo.userName,
 	)
 	# В edna получатель — это сам канал/линия, у него нет ID.
 	# Мы должны будем найти ID менеджера/бота amoCRM для ответа.
-	recipient = Participant(
+	recipient = Participant.model_construct(
 		provider_user_id="unknown",  # Будет определен позже
-		role=ParticipantRole.agent,
+		role=_ROLE_AGENT,
 	)
 
 	# Текст: используем text, иначе caption (например, подпись к изображению)
 	text_value = message_content.text or message_content.caption
 
-	return Message(
-		id=str(uuid4()),
-		direction=MessageDirection.inbound,  # Входящее от клиента в amoCRM
+	return Message.model_construct(
+		id=uuid4().hex,
+		direction=_DIR_IN,  # Входящее от клиента в amoCRM
 		content_type=content_type,
 		text=text_value,
 		attachment=attachment,
-		source_provider=ProviderName.edna,
+		source_provider=_PROV_EDNA,
 		source_conversation_id=payload.subject,  # This seems to be the conversation identifier
 		source_message_id=str(payload.id),  # The message ID
-		target_provider=ProviderName.amocrm,
+		target_provider=_PROV_AMO,
 		sent_at=payload.receivedAt,
 		sender=sender,
 		recipient=recipient,
@@ -73,15 +91,13 @@ def edna_message_to_domain(payload: EdnaIncomingMessage) -> Message:
 
 
 def edna_status_to_domain(payload: EdnaStatusUpdate) -> MessageStatusUpdate:
-	status_map = {
-		"SENT": MessageStatus.sent,
-		"DELIVERED": MessageStatus.delivered,
-		"READ": MessageStatus.read,
-	}
+	status = _EDNA_STATUS_MAP.get(payload.status)
+	if status is None:
+		status = _EDNA_STATUS_MAP.get(payload.status.upper(), _STATUS_SENT)
 	return MessageStatusUpdate(
-		provider=ProviderName.edna,
+		provider=_PROV_EDNA,
 		conversation_id=payload.subject,  # Используем subject как conversation_id
 		message_id=payload.requestId,  # Используем requestId как message_id
-		status=status_map.get(payload.status.upper(), MessageStatus.sent),
+		status=status,
 		occurred_at=payload.statusAt,  # Используем реальное время из webhook
 	)
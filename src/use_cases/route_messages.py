@@ -1,96 +1,143 @@
 from __future__ import annotations
 import logging
 import asyncio
-from typing import Protocol, Optional
-from domain.models import Message, MessageLink, ConversationLink
+import time
+import traceback
+import httpx
+from types import MappingProxyType
+from typing import Awaitable, Callable, Final, Mapping, Protocol, Optional
+from domain.models import Message, MessageLink, ConversationLink, ProviderMessageRef
 from domain.ports.message_provider import MessageProvider
+from domain.phone import is_phone_number
 from use_cases.mappers.amocrm_to_domain import amocrm_to_domain
 from use_cases.mappers.edna_to_domain import edna_message_to_domain
 from presentation.schemas.amocrm import AmoIncomingWebhook
 from presentation.schemas.edna import EdnaIncomingMessage
 from core.error_logger import get_error_reporter
+from core.log_utils import ContextLoggerAdapter, LazyJson, TruncatedText
 from .create_chat import CreateChatUseCase
-from infrastructure.http_clients.amocrm_rest_client import AmoCrmRestClient
+from .contact_lookup import DelayedContactLookupScheduler
+from .delivery_errors import DeliveryErrorNotifier
 from core.config import settings
 
+# Сколько сообщений из одной пачки отправляется в AmoCRM одновременно
+MESSAGE_CONCURRENCY = 10
+
+# Коды ошибок доставки для AmoCRM
+_ERROR_CODE_INTERNAL = 903  # Внутренняя ошибка сервера
+_ERROR_CODE_NO_CHAT = 904  # Невозможно создать чат
+_ERROR_CODE_DISABLED = 902  # Интеграция отключена
+_ERROR_CODE_NETWORK = 905  # Сетевая ошибка
+
+
+# Код ошибки по HTTP статусу ответа провайдера (остальные статусы -> внутренняя ошибка)
+_STATUS_ERROR_CODES: Final[Mapping[int, int]] = MappingProxyType({
+	404: _ERROR_CODE_NO_CHAT,
+	401: _ERROR_CODE_DISABLED,
+	403: _ERROR_CODE_DISABLED,
+})
+
+# Код ошибки по типу исключения; проверяется по порядку, первое совпадение выигрывает
+_ERROR_CODE_MAP: Final[tuple[tuple[type[BaseException], int], ...]] = (
+	(httpx.TransportError, _ERROR_CODE_NETWORK),
+	(TimeoutError, _ERROR_CODE_NETWORK),
+	(ConnectionError, _ERROR_CODE_NETWORK),
+)
+
+
+def _error_code(error: Exception) -> int:
+	"""Код ошибки доставки для AmoCRM по исключению провайдера"""
+	if isinstance(error, httpx.HTTPStatusError):
+		return _STATUS_ERROR_CODES.get(error.response.status_code, _ERROR_CODE_INTERNAL)
+	return next((code for error_type, code in _ERROR_CODE_MAP if isinstance(error, error_type)), _ERROR_CODE_INTERNAL)
+
+
+async def _run_writes(
+	writes: dict[str, Awaitable[None]],
+	log: logging.Logger | logging.LoggerAdapter,
+) -> list[str]:
+	"""
+	Выполняет независимые записи параллельно; ошибка каждой логируется отдельно
+	и не отменяет остальные. Возвращает имена успешно выполненных записей.
+	"""
+	results = await asyncio.gather(*writes.values(), return_exceptions=True)
+	saved = []
+	for name, write_result in zip(writes, results):
+		if isinstance(write_result, BaseException):
+			log.error("Не удалось сохранить %s", name, exc_info=write_result)
+		else:
+			saved.append(name)
+	return saved
+
+
+def _message_link(message: Message, reference: ProviderMessageRef) -> MessageLink:
+	"""Связь отправленного сообщения с исходным; поля уже проверены, валидацию пропускаем"""
+	return MessageLink.model_construct(
+		source_provider=message.source_provider,
+		source_message_id=message.source_message_id,
+		target_provider=reference.provider,
+		target_message_id=reference.message_id,
+		target_conversation_id=reference.conversation_id,
+	)
+
 
 class ConversationLinkRepository(Protocol):
 	async def get_edna_conversation_id(self, amocrm_chat_id: str) -> str | None: ...
 	async def get_amocrm_chat_id(self, edna_conversation_id: str) -> str | None: ...
+	async def get_amocrm_chat_ids_bulk(self, edna_conversation_ids: list[str]) -> dict[str, str | None]: ...
 	async def get_phone_by_chat_id(self, amocrm_chat_id: str) -> str | None: ...
 	async def get_chat_id_by_phone(self, phone_number: str) -> str | None: ...
 	async def save_link(self, link: ConversationLink) -> None: ...
 	async def save_phone_for_chat(self, amocrm_chat_id: str, phone_number: str) -> None: ...
+	async def save_link_with_phone(self, link: ConversationLink, phone_number: str) -> None: ...
 
 
 class MessageLinkRepository(Protocol):
 	async def get_link_by_source_id(self, source_message_id: str) -> MessageLink | None: ...
+	async def get_links_by_source_ids(self, source_message_ids: list[str]) -> dict[str, MessageLink | None]: ...
 	async def save_link(self, link: MessageLink) -> None: ...
+	async def save_links(self, links: list[MessageLink]) -> None: ...
 
 
 class RouteMessageFromEdnaUseCase:
 	def __init__(
 		self,
 		amocrm_provider: MessageProvider,
-		amocrm_rest: AmoCrmRestClient,
+		contact_lookup: DelayedContactLookupScheduler,
 		conv_links: ConversationLinkRepository,
 		msg_links: MessageLinkRepository,
 		create_chat_usecase: Optional[CreateChatUseCase] = None,
 		logger: Optional[logging.Logger] = None,
 	) -> None:
 		self._amocrm_provider = amocrm_provider
-		self._amocrm_rest = amocrm_rest
+		self._contact_lookup = contact_lookup
 		self._conv_links = conv_links
 		self._msg_links = msg_links
 		self._create_chat_usecase = create_chat_usecase
 		self._logger = logger or logging.getLogger(__name__)
 
 	async def execute(self, payload: EdnaIncomingMessage) -> None:
-		self._logger.debug("Routing message from Edna, payload=%s", payload.model_dump_json())
-		message = edna_message_to_domain(payload)
-		self._logger.debug("Mapped Edna message to domain model: %s", message.model_dump_json())
-
-		# Извлекаем номер телефона из сообщения Edna
-		phone_number = payload.subscriber.identifier
-		user_name = payload.userInfo.userName
+		# Уровень проверяем один раз: отладочные обертки ниже не создаются при выключенном DEBUG
+		debug = self._logger.isEnabledFor(logging.DEBUG)
+		if debug:
+			self._logger.debug("Routing message from Edna, payload=%s", LazyJson(payload))
+
+		# Поиск связи запускаем до маппинга: conversation_id берется прямо из payload,
+		# а sleep(0) дает задаче отправить запрос, пока мы строим доменную модель
+		lookup = asyncio.create_task(self._conv_links.get_amocrm_chat_id(payload.subject))
+		await asyncio.sleep(0)
+		try:
+			message = edna_message_to_domain(payload)
+		except BaseException:
+			lookup.cancel()
+			raise
+		if debug:
+			self._logger.debug("Mapped Edna message to domain model: %s", LazyJson(message))
 
-		target_conversation_id = await self._conv_links.get_amocrm_chat_id(
-			message.source_conversation_id
-		)
+		target_conversation_id = await lookup
 
 		if not target_conversation_id:
-			self._logger.warning(
-				"No AmoCRM chat link found for Edna conversation_id=%s. Creating a new chat.",
-				message.source_conversation_id,
-			)
-
-			# Создаем чат в AmoCRM, если указан use case для создания чатов
-			if self._create_chat_usecase:
-				try:
-					chat_result = await self._create_chat_usecase.execute(
-						edna_conversation_id=message.source_conversation_id,
-						phone_number=phone_number,
-						user_name=user_name
-					)
-					target_conversation_id = chat_result.id
-					self._logger.info(
-						"Created new chat in AmoCRM: chat_id=%s for phone=%s",
-						target_conversation_id,
-						phone_number
-					)
-				except Exception as e:
-					self._logger.error(
-						"Failed to create chat in AmoCRM for phone=%s: %s",
-						phone_number,
-						str(e)
-					)
-					# Fallback: используем ID из Edna как временный
-					target_conversation_id = message.source_conversation_id
-			else:
-				self._logger.warning(
-					"No create chat use case provided, using Edna conversation_id as temporary chat_id"
-				)
-				target_conversation_id = message.source_conversation_id
+			target_conversation_id = await self._create_chat(message, payload)
 		else:
 			self._logger.debug(
 				"Found linked AmoCRM chat_id=%s for Edna conversation_id=%s",
@@ -98,101 +145,145 @@ class RouteMessageFromEdnaUseCase:
 				message.source_conversation_id,
 			)
 
-		message.target_conversation_id = target_conversation_id
-		self._logger.debug("Установлен target_conversation_id=%s для отправки сообщения", target_conversation_id)
+		msg_link = await self._send(message, payload, target_conversation_id)
+		if msg_link is None:
+			return
 
 		try:
-			# Отправляем сообщение в AmoCRM
-			result = await self._amocrm_provider.send_message(message)
-			self._logger.debug(
-				"Message sent to AmoCRM, result: %s", result.model_dump_json()
+			await self._msg_links.save_link(msg_link)
+			if debug:
+				self._logger.debug("Saved message link: %s", LazyJson(msg_link))
+		except Exception:
+			self._logger.exception(
+				"Failed to save message link for Edna conversation_id=%s",
+				message.source_conversation_id,
 			)
 
-			# Используем conversation_id из ответа AmoCRM API для поиска контакта
-			amocrm_conversation_id = result.reference.conversation_id
-			self._logger.debug("Conversation_id из ответа AmoCRM: %s", amocrm_conversation_id)
-
-			# Запускаем фоновую задачу для получения contact_id через 10 секунд
-			self._logger.info("Запускаем фоновую задачу для поиска контакта через 10 секунд: amocrm_conversation_id=%s, phone=%s",
-							 amocrm_conversation_id, phone_number)
-			asyncio.create_task(
-				self._delayed_contact_lookup(
-					amocrm_conversation_id,
-					phone_number,
-					message.source_message_id
-				)
+	async def execute_batch(self, payloads: list[EdnaIncomingMessage]) -> None:
+		"""
+		Маршрутизирует пачку сообщений из Edna.
+
+		Связи чатов читаются одним запросом, сообщения разных разговоров отправляются
+		параллельно (не более MESSAGE_CONCURRENCY одновременно), а сообщения одного
+		разговора — по порядку, чтобы не создавать для него несколько чатов.
+		Связи сообщений сохраняются одной пачкой в конце.
+		"""
+		if not payloads:
+			return
+
+		conversations: dict[str, list[tuple[EdnaIncomingMessage, Message]]] = {}
+		for payload in payloads:
+			conversations.setdefault(payload.subject, []).append((payload, edna_message_to_domain(payload)))
+
+		targets = await self._conv_links.get_amocrm_chat_ids_bulk(list(conversations))
+		semaphore = asyncio.Semaphore(MESSAGE_CONCURRENCY)
+
+		async def route_conversation(
+			conversation_id: str,
+			items: list[tuple[EdnaIncomingMessage, Message]],
+		) -> list[MessageLink]:
+			target_conversation_id = targets.get(conversation_id)
+			# Чат создаем не больше одного раза: если не вышло, остальные сообщения идут по fallback в _send
+			create_attempted = False
+			links = []
+			for payload, message in items:
+				async with semaphore:
+					if not target_conversation_id and not create_attempted:
+						create_attempted = True
+						target_conversation_id = await self._create_chat(message, payload)
+					msg_link = await self._send(message, payload, target_conversation_id)
+				if msg_link is not None:
+					links.append(msg_link)
+			return links
+
+		results = await asyncio.gather(
+			*(route_conversation(conversation_id, items) for conversation_id, items in conversations.items())
+		)
+		msg_links = [link for links in results for link in links]
+		if not msg_links:
+			return
+
+		try:
+			await self._msg_links.save_links(msg_links)
+			self._logger.debug("Saved %d message links", len(msg_links))
+		except Exception:
+			self._logger.exception("Failed to save %d message links", len(msg_links))
+
+	async def _create_chat(self, message: Message, payload: EdnaIncomingMessage) -> Optional[str]:
+		"""Создает чат в AmoCRM для разговора без связи; None, если создать не удалось"""
+		self._logger.warning(
+			"No AmoCRM chat link found for Edna conversation_id=%s. Creating a new chat.",
+			message.source_conversation_id,
+		)
+
+		# Создаем чат в AmoCRM, если указан use case для создания чатов
+		if not self._create_chat_usecase:
+			self._logger.warning(
+				"No create chat use case provided, using Edna conversation_id as temporary chat_id"
 			)
+			return None
 
-			# Сохраняем связь ID сообщений
-			msg_link = MessageLink(
-				source_provider=message.source_provider,
-				source_message_id=message.source_message_id,
-				target_provider=result.reference.provider,
-				target_message_id=result.reference.message_id,
-				target_conversation_id=result.reference.conversation_id,
+		phone_number = payload.subscriber.identifier
+		try:
+			chat_result = await self._create_chat_usecase.execute(
+				edna_conversation_id=message.source_conversation_id,
+				phone_number=phone_number,
+				user_name=payload.userInfo.userName
 			)
-			await self._msg_links.save_link(msg_link)
-			self._logger.debug("Saved message link: %s", msg_link.model_dump_json())
+		except Exception as e:
+			self._logger.error(
+				"Failed to create chat in AmoCRM for phone=%s: %s",
+				phone_number,
+				str(e)
+			)
+			return None
+
+		self._logger.info(
+			"Created new chat in AmoCRM: chat_id=%s for phone=%s",
+			chat_result.id,
+			phone_number
+		)
+		return chat_result.id
+
+	async def _send(
+		self,
+		message: Message,
+		payload: EdnaIncomingMessage,
+		target_conversation_id: Optional[str],
+	) -> Optional[MessageLink]:
+		"""Отправляет сообщение в AmoCRM и возвращает связь сообщений (None при ошибке)"""
+		# Fallback: без чата в AmoCRM используем ID из Edna как временный
+		message.target_conversation_id = target_conversation_id or message.source_conversation_id
+		self._logger.debug("Установлен target_conversation_id=%s для отправки сообщения", message.target_conversation_id)
+
+		# Извлекаем номер телефона из сообщения Edna
+		phone_number = payload.subscriber.identifier
 
+		try:
+			# Отправляем сообщение в AmoCRM
+			result = await self._amocrm_provider.send_message(message)
+			if self._logger.isEnabledFor(logging.DEBUG):
+				self._logger.debug(
+					"Message sent to AmoCRM, result: %s", LazyJson(result)
+				)
 		except Exception:
 			self._logger.exception(
 				"Failed to send message to AmoCRM for Edna conversation_id=%s",
 				message.source_conversation_id,
 			)
+			return None
 
-	async def _delayed_contact_lookup(self, conversation_id: str, phone_number: str, message_id: str) -> None:
-		"""Фоновая задача для получения contact_id через 10 секунд после отправки сообщения"""
-		try:
-			self._logger.info("Запущена фоновая задача поиска контакта для AmoCRM conversation_id=%s (phone=%s, message_id=%s)",
-							 conversation_id, phone_number, message_id)
-
-			# Ждем 10 секунд
-			await asyncio.sleep(10)
-
-			self._logger.info("Начинаем поиск контакта для conversation_id=%s через 10 секунд (phone=%s)",
-							 conversation_id, phone_number)
-
-			# Пытаемся получить контакт по conversation_id
-			contact_links = await self._amocrm_rest.get_contact_links(chats_id=[conversation_id])
-
-			if contact_links["_total_items"] > 0:
-				contact_link = contact_links["_embedded"]["chats"][0]
-				contact_id = contact_link.get("contact_id")
-
-				if contact_id:
-					self._logger.info("Найден контакт id=%s для чата id=%s через фоновую задачу", contact_id, conversation_id)
-
-					# Нормализуем номер телефона
-					raw_phone = phone_number or ""
-					norm = raw_phone.strip().replace(" ", "").replace("-", "")
-					if norm.startswith("+"):
-						phone_e164 = norm
-					elif norm.startswith("8") and len(norm) == 11:
-						phone_e164 = "+7" + norm[1:]
-					elif norm.startswith("7") and len(norm) == 11:
-						phone_e164 = "+" + norm
-					else:
-						# Если начинается с 9 и длина 10 — считаем РФ
-						if len(norm) == 10 and norm.startswith("9"):
-							phone_e164 = "+7" + norm
-						else:
-							phone_e164 = "+" + norm if norm and not norm.startswith("+") else norm
-
-					self._logger.info("Нормализован номер телефона: '%s' -> '%s'", raw_phone, phone_e164)
-
-					# Обновляем телефон у контакта
-					await self._amocrm_rest.update_contact_phone(contact_id, phone_e164)
-					self._logger.info("Телефон контакта успешно обновлен в фоновой задаче")
-				else:
-					self._logger.warning("Contact_id не найден в ответе API для conversation_id=%s", conversation_id)
-			else:
-				self._logger.warning("Контакт не найден для conversation_id=%s даже через 10 секунд", conversation_id)
+		# Используем conversation_id из ответа AmoCRM API для поиска контакта
+		amocrm_conversation_id = result.reference.conversation_id
+		self._logger.debug("Conversation_id из ответа AmoCRM: %s", amocrm_conversation_id)
 
-		except Exception as e:
-			self._logger.exception(
-				"Ошибка в фоновой задаче поиска контакта для conversation_id=%s: %s",
-				conversation_id, str(e)
-			)
+		# Контакт ищем позже и пачкой: AmoCRM привязывает его к чату не сразу
+		self._logger.info("Планируем поиск контакта: amocrm_conversation_id=%s, phone=%s",
+						 amocrm_conversation_id, phone_number)
+		self._contact_lookup.add(amocrm_conversation_id, phone_number, message.source_message_id)
+
+		# Связь ID сообщений
+		return _message_link(message, result.reference)
 
 
 class RouteMessageFromAmoCrmUseCase:
@@ -202,6 +293,8 @@ class RouteMessageFromAmoCrmUseCase:
 		amocrm_provider: MessageProvider,
 		conv_links: ConversationLinkRepository,
 		msg_links: MessageLinkRepository,
+		delivery_errors: Optional[DeliveryErrorNotifier] = None,
+		contact_lookup: Optional[DelayedContactLookupScheduler] = None,
 		logger: Optional[logging.Logger] = None,
 	) -> None:
 		self._edna_provider = edna_provider
@@ -209,69 +302,67 @@ class RouteMessageFromAmoCrmUseCase:
 		self._conv_links = conv_links
 		self._msg_links = msg_links
 		self._logger = logger or logging.getLogger(__name__)
+		self._delivery_errors = delivery_errors or DeliveryErrorNotifier(amocrm_provider, logger=self._logger)
+		self._contact_lookup = contact_lookup
+		# Репортер создается при настройке логирования до сборки контейнера
+		self._error_reporter = get_error_reporter()
 
 	async def execute(self, payload: AmoIncomingWebhook) -> None:
+		# Вебхук по чату означает, что контакт уже привязан: отложенный поиск можно выполнить сразу
+		if self._contact_lookup is not None:
+			self._contact_lookup.trigger(payload.message.conversation.id)
+
 		# Сохраняем ID сообщения из AmoCRM для отправки статуса ошибки
 		amocrm_message_id = payload.message.message.id
 
-		self._logger.debug(
-			"Начата обработка сообщения из AmoCRM, account_id=%s, time=%s, message_id=%s",
-			payload.account_id, payload.time, amocrm_message_id
-		)
+		# account_id, conversation_id и message_id добавляются ко всем записям этого вызова
+		log = ContextLoggerAdapter(self._logger, {
+			"account_id": payload.account_id,
+			"conversation_id": payload.message.conversation.id,
+			"message_id": amocrm_message_id,
+		})
+		# Уровень проверяем один раз: аргументы отладочных логов ниже не создаются при выключенном DEBUG
+		debug = log.isEnabledFor(logging.DEBUG)
+
+		log.debug("Начата обработка сообщения из AmoCRM, time=%s", payload.time)
 
 		# Логируем информацию об источнике, если она присутствует
 		if payload.message.source:
-			self._logger.debug(
+			log.debug(
 				"Источник сообщения из AmoCRM: external_id=%s",
 				payload.message.source.external_id
 			)
 		else:
-			self._logger.debug("Источник сообщения из AmoCRM не указан")
+			log.debug("Источник сообщения из AmoCRM не указан")
 
 		try:
-			message = amocrm_to_domain(payload)
-			self._logger.debug(
-				"Сообщение преобразовано в доменную модель: id=%s, sender=%s, recipient=%s, conversation_id=%s",
-				message.id, message.sender.display_name, message.recipient.display_name, message.source_conversation_id
+			# Поиск связи запускаем до маппинга, чтобы запрос к репозиторию шел параллельно с ним
+			lookup = asyncio.create_task(
+				self._conv_links.get_edna_conversation_id(payload.message.conversation.id)
 			)
-			self._logger.debug("Детали сообщения: %s", message.model_dump_json())
+			await asyncio.sleep(0)
+			try:
+				message = amocrm_to_domain(payload)
+			except BaseException:
+				lookup.cancel()
+				raise
+			if debug:
+				log.debug(
+					"Сообщение преобразовано в доменную модель: id=%s, sender=%s, recipient=%s",
+					message.id, message.sender.display_name, message.recipient.display_name
+				)
+				log.debug("Детали сообщения: %s", LazyJson(message))
 
-			target_conversation_id = await self._conv_links.get_edna_conversation_id(
-				message.source_conversation_id
-			)
+			target_conversation_id = await lookup
 
-			if not target_conversation_id:
-				self._logger.warning(
-					"Связь с Edna не найдена для AmoCRM conversation_id=%s. Используем исходный ID как временный.",
-					message.source_conversation_id
-				)
-				message.target_conversation_id = message.source_conversation_id
-			else:
-				self._logger.debug(
-					"Найдена связь: AmoCRM conversation_id=%s -> Edna conversation_id=%s",
-					message.source_conversation_id, target_conversation_id
-				)
-				message.target_conversation_id = target_conversation_id
-
-				# Проверяем, есть ли сохраненный номер телефона для этого чата
-				saved_phone = await self._conv_links.get_phone_by_chat_id(message.source_conversation_id)
-				if saved_phone:
-					message.recipient.provider_user_id = saved_phone
-					self._logger.debug(
-						"Используем сохраненный номер телефона: %s для чата %s",
-						saved_phone, message.source_conversation_id
-					)
-				else:
-					message.recipient.provider_user_id = target_conversation_id
-					self._logger.warning(
-						"Сохраненный номер телефона не найден для чата %s, используем conversation_id",
-						message.source_conversation_id
-					)
+			# Адресат зависит только от того, есть ли связь с разговором Edna
+			await self._RESOLVE_TARGET[bool(target_conversation_id)](self, message, target_conversation_id, log)
 
-			self._logger.debug(
-				"Отправка сообщения в Edna: conversation_id=%s, sender=%s, text='%s'",
-				message.target_conversation_id, message.sender.display_name, message.text[:100] + "..." if message.text and len(message.text) > 100 else message.text
-			)
+			if debug:
+				log.debug(
+					"Отправка сообщения в Edna: conversation_id=%s, sender=%s, text='%s'",
+					message.target_conversation_id, message.sender.display_name, TruncatedText(message.text, 100)
+				)
 
 			# Если включен прокси для медиа и есть вложение из Amo, переписываем URL на публичный прокси
 			if settings.app.enable_media_proxy and message.attachment and message.attachment.url:
@@ -279,111 +370,128 @@ class RouteMessageFromAmoCrmUseCase:
 					public_base = settings.app.public_base_url or ""
 					if public_base:
 						proxy_url = f"{public_base.rstrip('/')}/media/proxy?url={message.attachment.url}"
-						self._logger.debug("Переписываем media URL на прокси: %s -> %s", message.attachment.url, proxy_url)
+						log.debug("Переписываем media URL на прокси: %s -> %s", message.attachment.url, proxy_url)
 						message.attachment.url = proxy_url
 				except Exception:
 					pass
 
+			started = time.perf_counter()
 			result = await self._edna_provider.send_message(message)
-
-			self._logger.info(
-				"Сообщение успешно отправлено в Edna: target_message_id=%s, target_conversation_id=%s",
-				result.reference.message_id, result.reference.conversation_id
-			)
-			self._logger.debug("Результат отправки: %s", result.model_dump_json())
+			if debug:
+				log.debug("Результат отправки: %s", LazyJson(result))
 
 			# Сохраняем связь ID сообщений
-			link = MessageLink(
-				source_provider=message.source_provider,
-				source_message_id=message.source_message_id,
-				target_provider=result.reference.provider,
-				target_message_id=result.reference.message_id,
-				target_conversation_id=result.reference.conversation_id,
-			)
+			link = _message_link(message, result.reference)
 
-			self._logger.debug(
-				"Сохраняем связь сообщений: source_provider=%s, source_message_id=%s -> target_provider=%s, target_message_id=%s, target_conversation_id=%s",
-				message.source_provider, message.source_message_id,
-				result.reference.provider, result.reference.message_id, result.reference.conversation_id
-			)
-
-			await self._msg_links.save_link(link)
-			self._logger.debug(
-				"Связь сообщений сохранена: source_id=%s -> target_id=%s",
-				message.source_message_id, result.reference.message_id
-			)
+			# Записи после отправки независимы друг от друга, выполняем их параллельно
+			writes = {"message_link": self._msg_links.save_link(link)}
 
 			# Если чат был новым, сохраняем связь разговоров
 			if not target_conversation_id:
-				new_conv_link = ConversationLink(
+				new_conv_link = ConversationLink.model_construct(
 					edna_conversation_id=result.reference.conversation_id,
 					amocrm_chat_id=message.source_conversation_id,
 				)
-				await self._conv_links.save_link(new_conv_link)
-				self._logger.debug(
-					"Сохранена новая связь разговоров: AmoCRM=%s -> Edna=%s",
-					message.source_conversation_id, result.reference.conversation_id
-				)
-
 				# Если у нас есть номер телефона получателя, сохраняем его для будущих сообщений
-				if (message.recipient.provider_user_id and
-					message.recipient.provider_user_id.isdigit()):
-					await self._conv_links.save_phone_for_chat(
-						message.source_conversation_id,
+				# вместе со связью: save_phone_for_chat обновляет уже существующую строку
+				if is_phone_number(message.recipient.provider_user_id):
+					writes["conversation_link"] = self._conv_links.save_link_with_phone(
+						new_conv_link,
 						message.recipient.provider_user_id
 					)
-					self._logger.debug(
-						"Сохранен номер телефона для чата: AmoCRM_chat_id=%s -> phone=%s",
-						message.source_conversation_id, message.recipient.provider_user_id
-					)
+				else:
+					writes["conversation_link"] = self._conv_links.save_link(new_conv_link)
 
-		except Exception as e:
-			error_message = str(e)
+			saved = await _run_writes(writes, log)
 
-			# Логируем ошибку в обычный лог
-			self._logger.exception(
-				"Ошибка при обработке сообщения из AmoCRM: account_id=%s, conversation_id=%s, message_id=%s, error=%s",
-				payload.account_id, payload.message.conversation.id, amocrm_message_id, error_message
+			# Одна запись на успешную отправку: отправка и сохранение связей вместе
+			log.info(
+				"Сообщение отправлено в Edna: source_message_id=%s -> target_message_id=%s, "
+				"target_conversation_id=%s, saved=%s, elapsed=%.1fms",
+				message.source_message_id, result.reference.message_id,
+				result.reference.conversation_id, ",".join(saved), (time.perf_counter() - started) * 1000
 			)
 
-			# Создаем детальный отчет об ошибке
-			error_reporter = get_error_reporter()
-			error_reporter.log_message_processing_error(
-				error=e,
-				source_provider="amocrm",
-				target_provider="edna",
-				message_id=amocrm_message_id,
-				conversation_id=payload.message.conversation.id,
-				account_id=payload.account_id
+		# Код ошибки определяем по типу исключения; исходная ошибка пробрасывается дальше
+		except Exception as e:
+			self._handle_delivery_failure(log, payload, e, _error_code(e))
+			raise
+
+	async def _resolve_unlinked(
+		self,
+		message: Message,
+		target_conversation_id: Optional[str],
+		log: ContextLoggerAdapter,
+	) -> None:
+		"""Связи нет: отправляем на исходный ID как временный"""
+		log.warning(
+			"Связь с Edna не найдена. Используем исходный ID как временный."
+		)
+		message.target_conversation_id = message.source_conversation_id
+
+	async def _resolve_linked(
+		self,
+		message: Message,
+		target_conversation_id: str,
+		log: ContextLoggerAdapter,
+	) -> None:
+		"""Связь есть: отправляем в связанный разговор на сохраненный номер телефона"""
+		log.debug(
+			"Найдена связь с Edna conversation_id=%s", target_conversation_id
+		)
+		message.target_conversation_id = target_conversation_id
+
+		# Проверяем, есть ли сохраненный номер телефона для этого чата
+		saved_phone = await self._conv_links.get_phone_by_chat_id(message.source_conversation_id)
+		if saved_phone:
+			message.recipient.provider_user_id = saved_phone
+			log.debug(
+				"Используем сохраненный номер телефона: %s", saved_phone
+			)
+		else:
+			message.recipient.provider_user_id = target_conversation_id
+			log.warning(
+				"Сохраненный номер телефона не найден, используем conversation_id"
 			)
 
-			# Определяем код ошибки на основе типа исключения
-			error_code = 903  # Внутренняя ошибка сервера по умолчанию
-			if "404" in error_message:
-				error_code = 904  # Невозможно создать чат
-			elif "403" in error_message or "401" in error_message:
-				error_code = 902  # Интеграция отключена
-			elif "timeout" in error_message.lower() or "connection" in error_message.lower():
-				error_code = 905  # Сетевая ошибка
+	# Выбор адресата по наличию связи (ключ: найдена ли связь с Edna)
+	_RESOLVE_TARGET: Final[Mapping[bool, Callable[..., Awaitable[None]]]] = MappingProxyType({
+		False: _resolve_unlinked,
+		True: _resolve_linked,
+	})
 
-			# Отправляем статус ошибки в AmoCRM
-			try:
-				await self._amocrm_provider.notify_delivery_error(
-					message_id=amocrm_message_id,
-					error_code=error_code,
-					error_text=f"Ошибка при отправке в Edna: {error_message}"
-				)
-			except Exception as notify_error:
-				self._logger.error(
-					"Не удалось отправить статус ошибки в AmoCRM: %s", str(notify_error)
-				)
-				# Логируем и эту ошибку в error_reports
-				error_reporter.log_delivery_status_error(
-					error=notify_error,
-					provider="amocrm",
-					message_id=amocrm_message_id,
-					error_details="Failed to send delivery error status"
-				)
+	def _handle_delivery_failure(
+		self,
+		log: ContextLoggerAdapter,
+		payload: AmoIncomingWebhook,
+		error: Exception,
+		error_code: int,
+	) -> None:
+		"""Логирует ошибку, пишет отчет и ставит в очередь статус ошибки для AmoCRM"""
+		amocrm_message_id = payload.message.message.id
+		error_message = str(error)
+		# Traceback форматируем один раз и отдаем и в обычный лог, и в отчет об ошибке
+		traceback_text = traceback.format_exc()
 
-			# Повторно выбрасываем оригинальную ошибку
-			raise
+		# Логируем ошибку в обычный лог
+		log.error(
+			"Ошибка при обработке сообщения из AmoCRM: error=%s\n%s", error_message, traceback_text.rstrip()
+		)
+
+		# Создаем детальный отчет об ошибке
+		self._error_reporter.log_message_processing_error(
+			error=error,
+			source_provider="amocrm",
+			target_provider="edna",
+			message_id=amocrm_message_id,
+			conversation_id=payload.message.conversation.id,
+			account_id=payload.account_id,
+			traceback_text=traceback_text
+		)
+
+		# Статус ошибки отправляется в AmoCRM в фоне, не задерживая обработку
+		self._delivery_errors.submit(
+			amocrm_message_id,
+			error_code,
+			f"Ошибка при отправке в Edna: {error_message}"
+		)
@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import logging
 import time
 from typing import Optional
@@ -8,10 +10,25 @@ from core.config import AmoCrmSettings
 from core.error_logger import get_error_reporter
 
 
+_BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _base36(number: int) -> str:
+	"""Запись неотрицательного числа в base36 (короче десятичной)"""
+	digits = []
+	while True:
+		number, rest = divmod(number, 36)
+		digits.append(_BASE36_DIGITS[rest])
+		if not number:
+			return "".join(reversed(digits))
+
+
 class SourceManager:
 	"""Менеджер для управления источниками чатов в AmoCRM"""
 
 	DEFAULT_SOURCE_NAME = "TeMa Edna"
+	# Счетчик для external_id: стартует с текущего времени в мс и не дает повторов внутри процесса
+	_external_ids = itertools.count(time.time_ns() // 1_000_000)
 
 	def __init__(
 		self,
@@ -23,6 +40,8 @@ class SourceManager:
 		self._amocrm_settings = amocrm_settings
 		self._logger = logger or logging.getLogger(__name__)
 		self._cached_tema_edna_source: Optional[Source] = None
+		# Текущий поиск/создание источника: одновременные вызовы ждут его, а не ходят в API сами
+		self._inflight: Optional[asyncio.Task] = None
 
 	async def ensure_tema_edna_source_exists(self) -> Source:
 		"""
@@ -30,12 +49,24 @@ class SourceManager:
 		Если источник уже существует - возвращает его.
 		Если не существует - создает новый.
 		"""
+		# Сначала проверим кеш
+		if self._cached_tema_edna_source:
+			self._logger.debug("Используем кешированный источник 'TeMa Edna' (ID: %s)", self._cached_tema_edna_source.id)
+			return self._cached_tema_edna_source
+
+		if self._inflight is None:
+			self._inflight = asyncio.ensure_future(self._resolve_tema_edna_source())
+			self._inflight.add_done_callback(self._clear_inflight)
+		# shield: отмена одного из ожидающих не должна прерывать поиск для остальных
+		return await asyncio.shield(self._inflight)
+
+	def _clear_inflight(self, task: asyncio.Task) -> None:
+		if self._inflight is task:
+			self._inflight = None
+
+	async def _resolve_tema_edna_source(self) -> Source:
+		"""Ищет источник 'TeMa Edna' в AmoCRM и создает его, если не найден"""
 		try:
-			# Сначала проверим кеш
-			if self._cached_tema_edna_source:
-				self._logger.debug("Используем кешированный источник 'TeMa Edna' (ID: %s)", self._cached_tema_edna_source.id)
-				return self._cached_tema_edna_source
-
 			# Ищем существующий источник по названию
 			self._logger.info("Ищем существующий источник '%s'", self.DEFAULT_SOURCE_NAME)
 			existing_source = await self._source_provider.get_source_by_name(self.DEFAULT_SOURCE_NAME)
@@ -134,8 +165,7 @@ class SourceManager:
 
 	def _generate_external_id(self) -> str:
 		"""Генерирует уникальный external_id для нового источника"""
-		timestamp = int(time.time())
-		return f"tema_edna_{timestamp}"
+		return f"tema_edna_{_base36(next(self._external_ids))}"
 
 	def _create_fallback_source(self) -> Source:
 		"""
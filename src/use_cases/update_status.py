@@ -1,10 +1,19 @@
 import logging
+from types import MappingProxyType
+from typing import Final, Mapping
 from domain.models import MessageStatusUpdate, ProviderName, MessageStatus
 from domain.ports.message_provider import StatusNotifier
 from presentation.schemas.edna import EdnaStatusUpdate
 from use_cases.mappers.edna_to_domain import edna_status_to_domain
 from use_cases.route_messages import MessageLinkRepository
 
+# Маппинг статусов Edna -> AmoCRM
+_EDNA_TO_AMOCRM_STATUS: Final[Mapping[MessageStatus, int]] = MappingProxyType({
+	MessageStatus.sent: 1,       # SENT -> доставлено
+	MessageStatus.delivered: 1,  # DELIVERED -> доставлено
+	MessageStatus.read: 2,       # READ -> прочитано
+})
+
 
 class UpdateMessageStatusUseCase:
 	def __init__(
@@ -33,20 +42,13 @@ class UpdateMessageStatusUseCase:
 		link = await self._msg_links.get_link_by_source_id(payload.requestId)
 
 		self._logger.debug(
-			"Найденная связь: requestId=%s, link=%s",
-			payload.requestId, link.model_dump() if link else None
+			"Найденная связь: requestId=%s, link=%r",
+			payload.requestId, link
 		)
 
 		# Проверяем, что сообщение было отправлено ИЗ AmoCRM В Edna
 		if link and link.source_provider == ProviderName.amocrm and link.target_provider == ProviderName.edna:
-			# Маппинг статусов Edna -> AmoCRM
-			edna_to_amocrm_status = {
-				MessageStatus.sent: 1,      # SENT -> доставлено
-				MessageStatus.delivered: 1, # DELIVERED -> доставлено
-				MessageStatus.read: 2,      # READ -> прочитано
-			}
-
-			amocrm_status = edna_to_amocrm_status.get(status_update.status)
+			amocrm_status = _EDNA_TO_AMOCRM_STATUS.get(status_update.status)
 			amocrm_message_id = link.source_message_id  # ID сообщения в AmoCRM
 
 			self._logger.info(
@@ -76,8 +78,8 @@ class UpdateMessageStatusUseCase:
 				)
 		else:
 			self._logger.warning(
-				"❌ Связь с сообщением не найдена или некорректна: requestId=%s, link=%s",
-				payload.requestId, link.model_dump() if link else None
+				"❌ Связь с сообщением не найдена или некорректна: requestId=%s, link=%r",
+				payload.requestId, link
 			)
 			if link:
 				self._logger.warning(